@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+import pytest
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (Amount, Favorite, Ingredient, Recipe,
+                            ShoppingCart, Subscribe, Tag)
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        email='cook@example.com', username='cook', first_name='Иван',
+        last_name='Петров', password='password')
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        email='chef@example.com', username='chef', first_name='Мария',
+        last_name='Иванова', password='password')
+
+
+@pytest.fixture
+def admin_user(django_user_model):
+    # Встроенная фикстура pytest-django не знает, что вход идёт по email.
+    return django_user_model.objects.create_superuser(
+        email='admin@example.com', username='admin', first_name='Админ',
+        last_name='Админов', password='password')
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast'),
+        Tag.objects.create(name='Обед', color='#49B64E', slug='lunch'),
+        Tag.objects.create(name='Ужин', color='#8775D2', slug='dinner'),
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(
+            name=name, measurement_unit=unit, calories=calories,
+            proteins=proteins, price=price)
+        for name, unit, calories, proteins, price in (
+            ('мука', 'г', 3.6, 0.1, '0.0600'),
+            ('молоко', 'мл', 0.6, 0.03, '0.0900'),
+            ('яйца', 'шт.', 78, 6.3, '12.5000'),
+            ('соль', 'по вкусу', None, None, None),
+        )
+    ]
+
+
+@pytest.fixture
+def recipes(user, author, tags, ingredients):
+    """Шесть рецептов двух авторов; у ``user`` есть подписка на ``author``,
+    избранное и список покупок."""
+    recipes = []
+    now = timezone.now()
+    for index in range(6):
+        recipe = Recipe(
+            author=author if index % 2 else user, name=f'Рецепт {index}',
+            text=f'Описание рецепта {index}', cooking_time=10 + index)
+        recipe.image.save(f'recipe{index}.png', ContentFile(b'image'),
+                          save=False)
+        recipe.save()
+        recipe.tags.set(tags[:1 + index % 3])
+        for offset, ingredient in enumerate(
+                ingredients[index % 2:index % 2 + 3]):
+            Amount.objects.create(
+                recipe=recipe, ingredient=ingredient,
+                amount=10 * (index + offset + 1))
+        # Разные даты дают однозначный порядок ленты.
+        Recipe.objects.filter(pk=recipe.pk).update(
+            pub_date=now - timedelta(minutes=index))
+        recipes.append(recipe)
+    Subscribe.objects.create(user=user, author=author)
+    Favorite.objects.create(user=user, recipe=recipes[1])
+    ShoppingCart.objects.create(user=user, recipe=recipes[1])
+    ShoppingCart.objects.create(user=user, recipe=recipes[2])
+    return recipes
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
@@ -0,0 +1,41 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+
+
+class FoodgramASGIHandler(ASGIHandler):
+    """ASGI-обработчик, который выполняет чтение параллельно.
+
+    В Django 3.0 нет асинхронной ORM и асинхронных представлений DRF,
+    поэтому GET-запросы к эндпоинтам из ``ASYNC_READ_URL_NAMES`` целиком
+    (middleware и представление) уходят в пул потоков, не блокируя
+    цикл событий и друг друга. Остальные запросы, включая все записи,
+    обрабатываются как в обычном ASGIHandler.
+    """
+
+    async def get_response(self, request):
+        if self.is_concurrent_read(request):
+            return await sync_to_async(
+                self.get_read_response, thread_sensitive=False)(request)
+        return await sync_to_async(super().get_response)(request)
+
+    def get_read_response(self, request):
+        # У потоков пула свои соединения с БД, сигналы request_started и
+        # request_finished до них не доходят, поэтому CONN_MAX_AGE
+        # проверяем здесь.
+        close_old_connections()
+        try:
+            return super().get_response(request)
+        finally:
+            close_old_connections()
+
+    def is_concurrent_read(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.url_name in settings.ASYNC_READ_URL_NAMES
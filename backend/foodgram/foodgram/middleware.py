@@ -0,0 +1,171 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.middleware.http import ConditionalGetMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import has_written, pin_primary, reset_written
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def close_if_health_check_failed(connection):
+    """Закрывает сохранённое соединение, если оно больше не работает.
+
+    Проверяет один раз за запрос и ещё раз после ошибки БД. Внутри
+    транзакции соединение не трогает: закрытие потеряло бы её.
+    """
+    if connection.in_atomic_block or (connection.health_check_done
+                                      and not connection.errors_occurred):
+        return
+    if connection.is_usable():
+        connection.errors_occurred = False
+    else:
+        connection.close()
+    connection.health_check_done = True
+
+
+def enable_health_checks(connection):
+    if getattr(connection, 'health_check_done', None) is not None:
+        return
+    get_cursor = connection._cursor
+
+    def _cursor(*args, **kwargs):
+        if connection.connection is None:
+            # Новое соединение проверять незачем.
+            connection.health_check_done = True
+        else:
+            close_if_health_check_failed(connection)
+        return get_cursor(*args, **kwargs)
+
+    connection._cursor = _cursor
+
+
+class DatabaseHealthCheckMiddleware:
+    """Проверяет постоянные соединения с БД перед первым запросом к ним.
+
+    Повторяет ``CONN_HEALTH_CHECKS`` из Django 4.1: если соединение,
+    оставшееся от прошлого запроса, больше не работает (перезапуск
+    PostgreSQL или pgbouncer), оно закрывается и будет открыто заново,
+    а запрос не упадёт с ошибкой. Проверяется только соединение, к
+    которому запрос обращается, перед первым курсором и после ошибок.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        for connection in connections.all():
+            if connection.settings_dict.get('CONN_HEALTH_CHECKS'):
+                enable_health_checks(connection)
+                connection.health_check_done = False
+        return self.get_response(request)
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет запрос за основной базой, когда реплики могут отставать.
+
+    С default работают небезопасные запросы и эндпоинты из
+    ``REPLICA_PRIMARY_URL_NAMES`` (переключатели избранного, списка покупок
+    и подписок меняют данные GET-запросом). После любой записи клиент
+    получает подписанную cookie ``REPLICA_PIN_COOKIE_NAME`` и ещё
+    ``REPLICA_STICKY_SECONDS`` секунд читает с default, чтобы сразу видеть
+    свои изменения. Метка живёт у клиента, поэтому работает при любом
+    числе процессов и серверов; срок проверяется по времени подписи.
+    """
+
+    salt = 'foodgram.replica-pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        pin_primary(request.method not in SAFE_METHODS
+                    or self.is_pinned(request))
+        reset_written()
+        try:
+            response = self.get_response(request)
+            if has_written():
+                response.set_signed_cookie(
+                    settings.REPLICA_PIN_COOKIE_NAME, '1', salt=self.salt,
+                    max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+                    samesite='Lax')
+        finally:
+            pin_primary(False)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (settings.DATABASE_REPLICAS and request.resolver_match.url_name
+                in settings.REPLICA_PRIMARY_URL_NAMES):
+            pin_primary()
+
+    def is_pinned(self, request):
+        return request.get_signed_cookie(
+            settings.REPLICA_PIN_COOKIE_NAME, default=None, salt=self.salt,
+            max_age=settings.REPLICA_STICKY_SECONDS) is not None
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Сжимает ответы brotli или gzip, если они не меньше порога.
+
+    Порог задаётся настройкой ``COMPRESSION_MIN_SIZE``. brotli
+    используется, только если установлен одноимённый пакет и клиент
+    передал ``br`` в Accept-Encoding.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming:
+            return super().process_response(request, response)
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        ae = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and re_accepts_brotli.search(ae):
+            encoding = 'br'
+            compressed_content = brotli.compress(
+                response.content, quality=settings.BROTLI_QUALITY)
+        elif re_accepts_gzip.search(ae):
+            encoding = 'gzip'
+            compressed_content = compress_string(response.content)
+        else:
+            return response
+
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class ApiConditionalGetMiddleware(ConditionalGetMiddleware):
+    """ETag и ответ 304 для GET-запросов к путям из ``ETAG_PATH_PREFIXES``.
+
+    ETag считается по несжатому телу ответа, поэтому в MIDDLEWARE этот
+    класс должен стоять после CompressionMiddleware.
+    """
+
+    def process_response(self, request, response):
+        if not request.path.startswith(tuple(settings.ETAG_PATH_PREFIXES)):
+            return response
+        return super().process_response(request, response)
@@ -1,5 +1,47 @@
-from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class FoodgramPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class FoodgramCursorPagination(CursorPagination):
+    """Курсорная пагинация по id: без COUNT(*) и OFFSET."""
+    ordering = 'id'
+    page_size_query_param = 'limit'
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для админки больших таблиц.
+
+    Для запроса без фильтров на PostgreSQL число строк берётся из
+    статистики планировщика (``pg_class.reltuples``) вместо COUNT(*),
+    если таблица больше ``estimate_threshold``. Номер последней страницы
+    при этом приблизительный.
+    """
+    estimate_threshold = 10000
+
+    def get_estimate(self):
+        """Число строк таблицы по статистике PostgreSQL или None."""
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = self.get_estimate()
+            if estimate is not None and estimate > self.estimate_threshold:
+                return estimate
+        return super().count
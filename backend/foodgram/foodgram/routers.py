@@ -0,0 +1,53 @@
+import random
+
+from asgiref.local import Local
+from django.conf import settings
+
+_state = Local()
+
+
+def pin_primary(value=True):
+    _state.primary = value
+
+
+def is_primary_pinned():
+    return getattr(_state, 'primary', False)
+
+
+def reset_written():
+    _state.written = False
+
+
+def has_written():
+    return getattr(_state, 'written', False)
+
+
+class ReplicaRouter:
+    """Отправляет чтение на реплики из ``DATABASE_REPLICAS``,
+    запись — в default.
+
+    Чтение тоже идёт в default, если запрос закреплён за основной базой
+    (см. ``ReplicaPinningMiddleware``) или модель относится к приложениям
+    из ``REPLICA_EXCLUDED_APPS``. Запись в модели из
+    ``REPLICA_UNTRACKED_MODELS`` (служебные счётчики) не закрепляет
+    клиента за default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (not settings.DATABASE_REPLICAS or is_primary_pinned()
+                or model._meta.app_label in settings.REPLICA_EXCLUDED_APPS):
+            return 'default'
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        # У модели кэша в базе урезанный _meta без label_lower.
+        label = f'{model._meta.app_label}.{model._meta.model_name}'
+        if label not in settings.REPLICA_UNTRACKED_MODELS:
+            _state.written = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -17,6 +17,7 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'recipes',
     'users',
+    'tasks',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -27,11 +28,14 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'djoser',
     'django_filters',
-    'drf_extra_fields',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.middleware.DatabaseHealthCheckMiddleware',
+    'foodgram.middleware.ReplicaPinningMiddleware',
+    'foodgram.middleware.CompressionMiddleware',
+    'foodgram.middleware.ApiConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -42,6 +46,10 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'foodgram.urls'
 
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+ETAG_PATH_PREFIXES = ('/api/',)
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -60,6 +68,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASYNC_READ_URL_NAMES = (
+    'recipe-list', 'recipe-detail', 'recipe-bundle',
+    'tag-list', 'tag-detail',
+    'ingredients-list', 'ingredients-detail',
+    'changes',
+)
+
 AUTH_USER_MODEL = 'users.User'
 
 DATABASES = {
@@ -70,10 +85,67 @@ DATABASES = {
         'USER': os.environ.get('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.environ.get('DB_HOST', default='db'),
-        'PORT': os.environ.get('DB_PORT', default='5432')
+        'PORT': os.environ.get('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', default=60)),
+        'CONN_HEALTH_CHECKS': os.environ.get(
+            'DB_CONN_HEALTH_CHECKS', default='True') == 'True',
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', default='False') == 'True',
     }
 }
 
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+        os.environ.get('DB_REPLICA_HOSTS', default='').split(',')):
+    if host.strip():
+        alias = f'replica{index}'
+        DATABASES[alias] = dict(
+            DATABASES['default'], HOST=host.strip(),
+            TEST={'MIRROR': 'default'})
+        DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.routers.ReplicaRouter']
+REPLICA_EXCLUDED_APPS = ('authtoken', 'sessions', 'django_cache')
+REPLICA_PRIMARY_URL_NAMES = ('favorite', 'shopping_cart', 'subscribe')
+REPLICA_STICKY_SECONDS = int(
+    os.environ.get('DB_REPLICA_STICKY_SECONDS', default=10))
+REPLICA_PIN_COOKIE_NAME = 'replica_pin'
+REPLICA_UNTRACKED_MODELS = ('recipes.throttlebucket',
+                            'recipes.throttlecounter',
+                            'django_cache.cacheentry')
+
+# Корзины токенов: burst — ёмкость, rate — скорость пополнения.
+THROTTLE_BUCKETS = {
+    'recipe_write': {'rate': '30/hour', 'burst': 10},
+    'shopping_cart_download': {'rate': '30/hour', 'burst': 5},
+    'ingredient_search': {'rate': '300/min', 'burst': 60},
+}
+
+# Кэш общий для всех процессов (gunicorn, run_tasks): по умолчанию
+# таблица в основной базе, создаётся командой createcachetable.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', default='django_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.environ.get('CACHE_MAX_ENTRIES', default=10000)),
+        },
+    },
+}
+
+RECIPE_BUNDLE_CACHE_SECONDS = int(
+    os.environ.get('RECIPE_BUNDLE_CACHE_SECONDS', default=300))
+
+CHANGELOG_SAFETY_SECONDS = int(
+    os.environ.get('CHANGELOG_SAFETY_SECONDS', default=5))
+
+TASK_MAX_ATTEMPTS = int(os.environ.get('TASK_MAX_ATTEMPTS', default=3))
+TASK_RETRY_DELAY = int(os.environ.get('TASK_RETRY_DELAY', default=30))
+TASK_LOCK_TIMEOUT = int(os.environ.get('TASK_LOCK_TIMEOUT', default=600))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,6 +185,10 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
+    'DEFAULT_RENDERER_CLASSES': [
+        'foodgram.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
@@ -128,6 +204,7 @@ DJOSER = {
 
     'SERIALIZERS': {
         'user': 'users.serializers.CustomUserSerializer',
+        'current_user': 'users.serializers.CustomUserSerializer',
     },
     'PERMISSIONS': {
         'activation': ['users.permissions.AllowNoOne'],
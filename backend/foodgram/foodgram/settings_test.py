@@ -0,0 +1,11 @@
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# Без DB_ENGINE в окружении тесты идут на SQLite в памяти и не требуют
+# PostgreSQL; с DB_ENGINE и остальными переменными — на указанной базе.
+DATABASES['default']['ENGINE'] = os.environ.get(
+    'DB_ENGINE', default='django.db.backends.sqlite3')
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
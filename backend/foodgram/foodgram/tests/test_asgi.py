@@ -0,0 +1,99 @@
+"""Чтение через FoodgramASGIHandler уходит в пул потоков."""
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+
+from foodgram import handlers
+from foodgram.handlers import FoodgramASGIHandler
+
+# Пул потоков работает со своими соединениями и не видит данных
+# незафиксированной транзакции теста.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def offloaded(monkeypatch):
+    calls = []
+    get_read_response = FoodgramASGIHandler.get_read_response
+
+    def spy(self, request):
+        calls.append(request.path)
+        return get_read_response(self, request)
+
+    monkeypatch.setattr(FoodgramASGIHandler, 'get_read_response', spy)
+    return calls
+
+
+def call(path, method='GET', headers=()):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'root_path': '',
+        'query_string': query.encode(), 'headers': list(headers),
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(FoodgramASGIHandler())(scope, receive, send)
+    status = messages[0]['status']
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return status, body
+
+
+@pytest.mark.parametrize('method, path, expected', (
+    ('GET', '/api/recipes/', True),
+    ('GET', '/api/recipes/1/', True),
+    ('GET', '/api/recipes/1/bundle/', True),
+    ('HEAD', '/api/tags/', True),
+    ('GET', '/api/tags/1/', True),
+    ('GET', '/api/ingredients/?search=му', True),
+    ('POST', '/api/recipes/', False),
+    ('DELETE', '/api/recipes/1/', False),
+    ('GET', '/api/recipes/1/favorite/', False),
+    ('GET', '/api/recipes/download_shopping_cart/', False),
+    ('GET', '/api/users/', False),
+    ('GET', '/api/unknown/', False),
+))
+def test_whitelist(method, path, expected):
+    request = RequestFactory().generic(method, path)
+
+    assert FoodgramASGIHandler().is_concurrent_read(request) is expected
+
+
+def test_reads_are_offloaded_and_match_wsgi(recipes, client, offloaded):
+    for path in ('/api/recipes/?limit=3', f'/api/recipes/{recipes[0].id}/',
+                 '/api/tags/', '/api/ingredients/?search=м'):
+        status, body = call(path)
+
+        assert status == 200
+        assert body == client.get(path).content
+    assert offloaded == ['/api/recipes/', f'/api/recipes/{recipes[0].id}/',
+                         '/api/tags/', '/api/ingredients/']
+
+
+def test_other_requests_use_normal_handler(recipes, offloaded):
+    status, _ = call('/api/users/me/')
+    assert status == 401
+    status, _ = call('/api/recipes/', method='POST')
+    assert status == 401
+
+    assert offloaded == []
+
+
+def test_connections_closed_around_offloaded_call(tags, monkeypatch):
+    calls = []
+    monkeypatch.setattr(handlers, 'close_old_connections',
+                        lambda: calls.append('close'))
+
+    call('/api/tags/')
+    assert calls == ['close', 'close']
+
+    calls.clear()
+    call('/api/users/me/')
+    assert calls == []
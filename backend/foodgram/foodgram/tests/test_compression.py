@@ -0,0 +1,121 @@
+"""Сжатие ответов и ETag для API."""
+import gzip
+
+import pytest
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from foodgram import middleware
+from foodgram.middleware import CompressionMiddleware
+from recipes.models import Tag
+
+URL = '/api/tags/'
+
+
+@pytest.fixture(autouse=True)
+def min_size(settings):
+    settings.COMPRESSION_MIN_SIZE = 100
+    return settings
+
+
+@pytest.fixture
+def large_tags(tags):
+    # Три тега дают меньше COMPRESSION_MIN_SIZE, добавляем ещё.
+    Tag.objects.bulk_create([
+        Tag(name=f'Тег {index}', color=f'#0000{index:02d}',
+            slug=f'tag{index}')
+        for index in range(10)])
+
+
+def get(client, encoding=None, **headers):
+    if encoding:
+        headers['HTTP_ACCEPT_ENCODING'] = encoding
+    return client.get(URL, **headers)
+
+
+def test_small_response_is_not_compressed(large_tags, client, min_size):
+    plain = get(client).content
+    min_size.COMPRESSION_MIN_SIZE = len(plain) + 1
+
+    response = get(client, 'gzip, br')
+
+    assert not response.has_header('Content-Encoding')
+    assert response.content == plain
+
+
+def test_brotli_is_preferred(large_tags, client):
+    brotli = pytest.importorskip('brotli')
+    plain = get(client).content
+
+    response = get(client, 'gzip, deflate, br')
+
+    assert response['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.content) == plain
+    assert response['Content-Length'] == str(len(response.content))
+    assert 'Accept-Encoding' in response['Vary']
+
+
+def test_gzip_without_brotli(large_tags, client, monkeypatch):
+    plain = get(client).content
+    monkeypatch.setattr(middleware, 'brotli', None)
+
+    response = get(client, 'gzip, br')
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == plain
+
+
+def test_identity_keeps_vary(large_tags, client):
+    response = get(client, 'identity')
+
+    assert not response.has_header('Content-Encoding')
+    assert 'Accept-Encoding' in response['Vary']
+
+
+def test_encoded_response_is_passed_through():
+    body = b'x' * 1000
+    response = HttpResponse(body)
+    response['Content-Encoding'] = 'br'
+    request = RequestFactory().get(URL, HTTP_ACCEPT_ENCODING='gzip')
+
+    response = CompressionMiddleware(lambda request: response)(request)
+
+    assert response['Content-Encoding'] == 'br'
+    assert response.content == body
+
+
+def test_etag_is_weak_after_compression(large_tags, client):
+    etag = get(client)['ETag']
+
+    compressed = get(client, 'gzip')
+
+    assert etag.startswith('"')
+    # ETag считается по несжатому телу, это одно и то же представление.
+    assert compressed['ETag'] == 'W/' + etag
+
+
+@pytest.mark.parametrize('encoding', (None, 'gzip', 'br'))
+def test_if_none_match_returns_304(large_tags, client, encoding):
+    etag = get(client, encoding)['ETag']
+
+    response = get(client, encoding, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response.content == b''
+
+
+def test_no_etag_outside_api(client):
+    response = client.get('/admin/login/')
+
+    assert response.status_code == 200
+    assert not response.has_header('ETag')
+
+
+def test_conditional_get_runs_before_compression():
+    # Ответ проходит MIDDLEWARE снизу вверх: ETag должен считаться
+    # до сжатия, то есть ApiConditionalGetMiddleware стоит ниже.
+    assert settings.MIDDLEWARE.index(
+        'foodgram.middleware.CompressionMiddleware'
+    ) < settings.MIDDLEWARE.index(
+        'foodgram.middleware.ApiConditionalGetMiddleware')
@@ -0,0 +1,58 @@
+from unittest import mock
+
+import pytest
+from django.db import connection, transaction
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def is_usable(monkeypatch):
+    connection.ensure_connection()
+    check = mock.Mock(return_value=True)
+    monkeypatch.setattr(connection, 'is_usable', check)
+    return check
+
+
+def test_checks_used_connection_once_per_request(recipes, client, is_usable):
+    client.get('/api/recipes/')
+    client.get('/api/recipes/')
+
+    assert is_usable.call_count == 2
+
+
+def test_skips_requests_without_queries(client, is_usable):
+    client.get('/api/not-found/')
+
+    assert not is_usable.called
+
+
+def test_rechecks_after_database_error(tags, client, is_usable):
+    client.get('/api/tags/')
+    connection.errors_occurred = True
+    connection.cursor().close()
+
+    assert is_usable.call_count == 2
+    assert not connection.errors_occurred
+
+
+def test_closes_unusable_connection(tags, client, is_usable, monkeypatch):
+    is_usable.return_value = False
+    close = mock.Mock(wraps=connection.close)
+    monkeypatch.setattr(connection, 'close', close)
+
+    response = client.get('/api/tags/')
+
+    assert response.status_code == 200
+    close.assert_called_once_with()
+
+
+def test_leaves_open_transaction_alone(tags, client, is_usable):
+    client.get('/api/not-found/')
+    with transaction.atomic():
+        connection.cursor().close()
+        is_usable.reset_mock()
+        connection.health_check_done = False
+        connection.cursor().close()
+
+    assert not is_usable.called
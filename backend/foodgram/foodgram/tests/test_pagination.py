@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+
+from foodgram.pagination import EstimatedCountPaginator
+from recipes.models import Tag
+
+
+@pytest.fixture
+def estimate(monkeypatch):
+    calls = []
+
+    def set_estimate(value):
+        def get_estimate(self):
+            calls.append(self.object_list)
+            return value
+        monkeypatch.setattr(EstimatedCountPaginator, 'get_estimate',
+                            get_estimate)
+        return calls
+    return set_estimate
+
+
+def test_large_table_uses_estimate(tags, estimate,
+                                   django_assert_num_queries):
+    estimate(50000)
+    paginator = EstimatedCountPaginator(Tag.objects.all(), 20)
+
+    with django_assert_num_queries(0):
+        assert paginator.count == 50000
+    assert paginator.num_pages == 2500
+
+
+def test_small_table_counts_exactly(tags, estimate):
+    estimate(EstimatedCountPaginator.estimate_threshold)
+
+    assert EstimatedCountPaginator(Tag.objects.all(), 20).count == 3
+
+
+def test_filtered_queryset_counts_exactly(tags, estimate):
+    calls = estimate(50000)
+    paginator = EstimatedCountPaginator(
+        Tag.objects.filter(slug='lunch'), 20)
+
+    assert paginator.count == 1
+    assert calls == []
+
+
+@pytest.mark.skipif(connection.vendor == 'postgresql',
+                    reason='SQLite не хранит статистику строк')
+def test_estimate_only_on_postgresql(tags):
+    paginator = EstimatedCountPaginator(Tag.objects.all(), 20)
+
+    assert paginator.get_estimate() is None
+    assert paginator.count == 3
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql',
+                    reason='reltuples есть только в PostgreSQL')
+def test_estimate_reads_reltuples(tags):
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE recipes_tag')
+
+    paginator = EstimatedCountPaginator(Tag.objects.all(), 20)
+
+    assert paginator.get_estimate() == 3
@@ -0,0 +1,82 @@
+"""Маршрутизация чтения: default и реплика — две отдельные базы SQLite."""
+import pytest
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connections
+
+from foodgram.routers import ReplicaRouter, has_written, reset_written
+from recipes.models import Recipe, Tag
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    connections.databases['replica'] = dict(
+        connections.databases['default'], NAME=str(tmp_path / 'replica'))
+    with connections['replica'].schema_editor() as editor:
+        for model in apps.get_models():
+            if model._meta.managed and not model._meta.proxy:
+                editor.create_model(model)
+    settings.DATABASE_REPLICAS = ['replica']
+    yield connections['replica']
+    connections['replica'].close()
+    del connections.databases['replica']
+    del connections._connections.replica
+
+
+def get_slugs(client):
+    return [tag['slug']
+            for tag in client.get('/api/tags/').json()['results']]
+
+
+def test_safe_reads_go_to_replica(tags, replica, client):
+    # bulk_create не отправляет сигналы, которые пишут в default.
+    Tag.objects.using('replica').bulk_create([
+        Tag(name='С реплики', color='#000000', slug='replica')])
+
+    assert get_slugs(client) == ['replica']
+
+
+def test_excluded_apps_and_writes_use_default(replica):
+    router = ReplicaRouter()
+    reset_written()
+
+    assert router.db_for_read(Tag) == 'replica'
+    assert not has_written()
+    assert router.db_for_read(
+        apps.get_model('authtoken', 'Token')) == 'default'
+    cache_model = cache.cache_model_class
+    assert router.db_for_read(cache_model) == 'default'
+    assert router.db_for_write(cache_model) == 'default'
+    assert not has_written()
+    assert router.db_for_write(Tag) == 'default'
+    assert has_written()
+
+
+def test_toggle_endpoint_reads_primary(recipes, replica, user_client):
+    recipe = recipes[0]
+
+    response = user_client.get(f'/api/recipes/{recipe.id}/favorite/')
+
+    assert response.status_code == 201
+    assert not Recipe.objects.using('replica').exists()
+
+
+def test_client_sticks_to_primary_after_write(
+        recipes, tags, replica, user_client):
+    response = user_client.get(f'/api/recipes/{recipes[0].id}/favorite/')
+
+    cookie = response.cookies['replica_pin']
+    assert cookie['max-age'] == 10
+    assert cookie['httponly']
+    assert get_slugs(user_client) == ['breakfast', 'lunch', 'dinner']
+
+    user_client.cookies.clear()
+    assert get_slugs(user_client) == []
+
+
+def test_forged_pin_is_ignored(tags, replica, client):
+    client.cookies['replica_pin'] = '1'
+
+    assert get_slugs(client) == []
@@ -0,0 +1,67 @@
+import pytest
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foodgram.throttling import get_stats
+from recipes import throttling
+from recipes.models import ThrottleBucket
+
+SEARCH = '/api/ingredients/?search=мука'
+
+
+@pytest.fixture(autouse=True)
+def buckets(settings):
+    settings.THROTTLE_BUCKETS = {
+        'recipe_write': {'rate': '1/hour', 'burst': 2},
+        'shopping_cart_download': {'rate': '1/hour', 'burst': 5},
+        'ingredient_search': {'rate': '1/hour', 'burst': 2},
+    }
+
+
+def make_client(user=None, ip='10.0.0.1'):
+    client = APIClient(REMOTE_ADDR=ip)
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def search(client, times):
+    return [client.get(SEARCH).status_code for _ in range(times)]
+
+
+def test_user_and_ip_buckets_both_apply(ingredients, user, author):
+    assert search(make_client(user), 3) == [200, 200, 429]
+    # Тот же пользователь с другого адреса: его корзина пуста.
+    assert search(make_client(user, ip='10.0.0.2'), 1) == [429]
+    # Другой пользователь с того же адреса: пуста корзина адреса,
+    # списанное из его корзины возвращается.
+    assert search(make_client(author), 1) == [429]
+    assert search(make_client(author, ip='10.0.0.3'), 3) == [200, 200, 429]
+
+    assert get_stats()['ingredient_search'] == {
+        'rate': '1/hour', 'burst': 2, 'allowed': 4, 'throttled': 4}
+
+
+def test_throttled_response_has_retry_after(ingredients):
+    client = make_client()
+    search(client, 2)
+
+    response = client.get(SEARCH)
+
+    assert response.status_code == 429
+    assert 3000 < int(response['Retry-After']) <= 3600
+
+
+def test_shopping_list_length_is_charged_after_loading(
+        recipes, user, monkeypatch):
+    monkeypatch.setattr(throttling, 'CART_COST_LINES', 2)
+    client = make_client(user)
+
+    statuses = [client.get('/api/recipes/download_shopping_cart/').status_code
+                for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+    bucket = ThrottleBucket.objects.get(
+        key=f'shopping_cart_download:user-{user.pk}')
+    assert bucket.tokens == pytest.approx(-1, abs=0.01)
@@ -0,0 +1,145 @@
+"""Ограничение частоты запросов корзиной токенов с учётом стоимости.
+
+Корзина вмещает ``burst`` токенов и пополняется со скоростью ``rate``
+(в формате DRF: ``'30/min'``). Запрос списывает столько токенов,
+сколько вернул ``get_cost``, поэтому тяжёлый запрос (большая картинка,
+длинный список покупок) расходует лимит быстрее. Корзины две: по
+IP-адресу и, для вошедшего пользователя, по пользователю; запрос
+проходит, только если токенов хватает в обеих.
+
+Корзины и счётчики хранятся в основной базе (``ThrottleBucket``,
+``ThrottleCounter``), поэтому лимит общий для всех процессов. Токены
+списываются одним условным UPDATE, и два одновременных запроса не
+могут потратить одни и те же токены.
+"""
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Least
+from rest_framework.throttling import BaseThrottle
+
+from recipes.models import ThrottleBucket, ThrottleCounter
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+STATS_RESULTS = ('allowed', 'throttled')
+
+
+def parse_rate(rate):
+    num, period = rate.split('/')
+    return int(num) / DURATIONS[period[0]]
+
+
+def record(scope, result):
+    counters = ThrottleCounter.objects.filter(scope=scope)
+    if counters.update(**{result: F(result) + 1}):
+        return
+    try:
+        with transaction.atomic():
+            ThrottleCounter.objects.create(scope=scope, **{result: 1})
+    except IntegrityError:
+        counters.update(**{result: F(result) + 1})
+
+
+def get_stats():
+    counters = {counter.scope: counter
+                for counter in ThrottleCounter.objects.using('default')}
+    stats = {}
+    for scope, bucket in settings.THROTTLE_BUCKETS.items():
+        counter = counters.get(scope)
+        stats[scope] = dict(bucket, **{
+            result: getattr(counter, result, 0) for result in STATS_RESULTS})
+    return stats
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+    key_format = '{scope}:{ident}'
+
+    def __init__(self):
+        bucket = settings.THROTTLE_BUCKETS[self.scope]
+        self.capacity = bucket['burst']
+        self.refill = parse_rate(bucket['rate'])
+        self.deficit = 0
+
+    def get_cost(self, request, view):
+        return 1
+
+    def get_keys(self, request):
+        idents = [f'ip-{self.get_ident(request)}']
+        if request.user and request.user.is_authenticated:
+            idents.insert(0, f'user-{request.user.pk}')
+        return [self.key_format.format(scope=self.scope, ident=ident)
+                for ident in idents]
+
+    def available(self, now):
+        """Токены в корзине на момент ``now`` с учётом пополнения."""
+        return Least(
+            Value(float(self.capacity)),
+            F('tokens') + (Value(now) - F('updated')) * Value(self.refill),
+            output_field=FloatField())
+
+    def take(self, key, cost, now):
+        buckets = ThrottleBucket.objects.filter(key=key)
+        taken = buckets.filter(
+            tokens__gte=Value(float(cost))
+            - (Value(now) - F('updated')) * Value(self.refill)
+        ).update(tokens=self.available(now) - Value(float(cost)),
+                 updated=now)
+        if taken:
+            return True
+        row = buckets.using('default').values_list(
+            'tokens', 'updated').first()
+        if row is None:
+            try:
+                with transaction.atomic():
+                    ThrottleBucket.objects.create(
+                        key=key, scope=self.scope,
+                        tokens=self.capacity - cost, updated=now)
+            except IntegrityError:
+                # Корзину только что создал параллельный запрос.
+                return self.take(key, cost, now)
+            # Корзина, не тронутая дольше полного пополнения, полна:
+            # такие строки не нужны.
+            ThrottleBucket.objects.filter(
+                scope=self.scope,
+                updated__lt=now - self.capacity / self.refill).delete()
+            return True
+        tokens, updated = row
+        available = min(self.capacity, tokens + (now - updated) * self.refill)
+        self.deficit = max(self.deficit, cost - available)
+        return False
+
+    def charge(self, request, cost):
+        """Списывает ``cost`` токенов без проверки, корзина может уйти в минус.
+
+        Для доплаты, которую представление узнаёт, только загрузив данные.
+        """
+        if cost <= 0:
+            return
+        now = time.time()
+        ThrottleBucket.objects.filter(key__in=self.get_keys(request)).update(
+            tokens=self.available(now) - Value(float(cost)), updated=now)
+
+    def allow_request(self, request, view):
+        cost = min(self.get_cost(request, view), self.capacity)
+        if cost <= 0:
+            return True
+        now = time.time()
+        taken = []
+        for key in self.get_keys(request):
+            if not self.take(key, cost, now):
+                # Возвращаем списанное из корзин, в которых токенов хватило.
+                ThrottleBucket.objects.filter(key__in=taken).update(
+                    tokens=Least(Value(float(self.capacity)),
+                                 F('tokens') + Value(float(cost)),
+                                 output_field=FloatField()))
+                record(self.scope, 'throttled')
+                return False
+            taken.append(key)
+        record(self.scope, 'allowed')
+        return True
+
+    def wait(self):
+        return self.deficit / self.refill
@@ -3,8 +3,11 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from .views import throttle_stats
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/throttle_stats/', throttle_stats, name='throttle_stats'),
     path('api/auth/', include('users.urls')),
     path('api/', include('recipes.urls')),
     path('api/', include('users.urls')),
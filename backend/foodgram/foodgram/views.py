@@ -0,0 +1,11 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .throttling import get_stats
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def throttle_stats(request):
+    return Response(get_stats())
@@ -1,37 +1,82 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from foodgram.pagination import EstimatedCountPaginator
 
 from .models import (Amount, Favorite, Ingredient, Recipe, ShoppingCart,
                      Subscribe, Tag)
 
 
-class RecipeAdmin(admin.ModelAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'color', 'slug')
+    search_fields = ('^name',)
+
+
+class RecipeAdmin(LargeTableAdmin):
     list_display = ('name', 'author', 'followers')
-    list_filter = ('author', 'name', 'tags__name')
+    list_filter = ('tags',)
+    list_select_related = ('author',)
+    search_fields = ('^name',)
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('tags',)
+
+    def get_queryset(self, request):
+        # Подзапрос считается только для строк текущей страницы,
+        # в отличие от JOIN с GROUP BY по всей таблице.
+        followers = Favorite.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(count=Count('id'))
+        return super().get_queryset(request).annotate(
+            followers_count=Coalesce(
+                Subquery(followers.values('count'),
+                         output_field=IntegerField()), 0))
 
     def followers(self, obj):
-        return obj.favorite_recipe.all().count()
+        return obj.followers_count
     followers.short_description = 'Добавлен в избранное'
+    followers.admin_order_field = 'followers_count'
 
 
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
-    list_filter = ('name',)
+    search_fields = ('^name',)
 
 
-class AmountAmin(admin.ModelAdmin):
+class AmountAmin(LargeTableAdmin):
     list_display = ('recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    raw_id_fields = ('recipe',)
+    autocomplete_fields = ('ingredient',)
+
+
+class UserRecipeAdmin(LargeTableAdmin):
+    list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    raw_id_fields = ('user', 'recipe')
+
+
+class SubscribeAdmin(LargeTableAdmin):
+    list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
 
 
 admin.site.register(Ingredient, IngredientAdmin)
 
 admin.site.register(Recipe, RecipeAdmin)
 
-admin.site.register(Tag)
+admin.site.register(Tag, TagAdmin)
 
 admin.site.register(Amount, AmountAmin)
 
-admin.site.register(Subscribe)
+admin.site.register(Subscribe, SubscribeAdmin)
 
-admin.site.register(Favorite)
+admin.site.register(Favorite, UserRecipeAdmin)
 
-admin.site.register(ShoppingCart)
+admin.site.register(ShoppingCart, UserRecipeAdmin)
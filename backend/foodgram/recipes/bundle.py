@@ -0,0 +1,116 @@
+"""Всё для страницы рецепта одним ответом.
+
+Часть, одинаковая для всех зрителей (рецепт, автор с числом рецептов,
+id похожих и рекомендуемых рецептов), кэшируется по рецепту и по
+автору. Для зрителя отдельно выбираются только флаги избранного,
+списка покупок и подписки, одним запросом.
+
+Кэш сбрасывается сигналами при изменении рецепта, его ингредиентов
+и тегов, автора и при пересчёте соседей. Переименование тега или
+ингредиента доживает до истечения ``RECIPE_BUNDLE_CACHE_SECONDS``.
+
+Кэш общий для всех процессов (``CACHES``, по умолчанию таблица в базе),
+поэтому сброс из обработчика задач виден и веб-процессам.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .fastpath import (AUTHOR_VALUES_FIELDS, get_recipe_values_fields,
+                       serialize_recipes)
+from .models import (Favorite, Recipe, RecipeNeighbors, ShoppingCart,
+                     Subscribe)
+from .serializers import RECIPE_FIELDS
+
+User = get_user_model()
+
+RECIPE_KEY = 'recipe-bundle:recipe:{}'
+AUTHOR_KEY = 'recipe-bundle:author:{}'
+RELATED_KINDS = (('similar', RecipeNeighbors.SIMILAR),
+                 ('recommendations', RecipeNeighbors.ALSO_FAVORITED))
+
+
+def get_recipe_part(recipe_id):
+    key = RECIPE_KEY.format(recipe_id)
+    part = cache.get(key)
+    if part is None:
+        rows = Recipe.objects.filter(id=recipe_id).values(
+            *get_recipe_values_fields(RECIPE_FIELDS))
+        recipes = serialize_recipes(rows, None, RECIPE_FIELDS, ('author',))
+        if not recipes:
+            return None
+        related = {
+            neighbors.kind: neighbors.get_neighbor_ids()
+            for neighbors in RecipeNeighbors.objects.filter(
+                recipe_id=recipe_id).only('kind', 'neighbor_ids')}
+        part = {'recipe': recipes[0]}
+        for name, kind in RELATED_KINDS:
+            part[name] = related.get(kind, [])
+        cache.set(key, part, settings.RECIPE_BUNDLE_CACHE_SECONDS)
+    return part
+
+
+def get_author_part(author_id):
+    key = AUTHOR_KEY.format(author_id)
+    author = cache.get(key)
+    if author is None:
+        recipes_count = Recipe.objects.filter(
+            author=OuterRef('pk')
+        ).order_by().values('author').annotate(count=Count('id'))
+        author = User.objects.filter(id=author_id).annotate(
+            recipes_count=Coalesce(Subquery(recipes_count.values('count'),
+                                            output_field=IntegerField()), 0)
+        ).values(*AUTHOR_VALUES_FIELDS, 'recipes_count').first()
+        cache.set(key, author, settings.RECIPE_BUNDLE_CACHE_SECONDS)
+    return author
+
+
+def get_viewer_flags(user, recipe_id, author_id):
+    if not user.is_authenticated:
+        return {'is_favorited': False, 'is_in_shopping_cart': False,
+                'is_subscribed': False}
+    return User.objects.filter(id=user.id).annotate(
+        is_favorited=Exists(Favorite.objects.filter(
+            user=OuterRef('pk'), recipe_id=recipe_id)),
+        is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+            user=OuterRef('pk'), recipe_id=recipe_id)),
+        is_subscribed=Exists(Subscribe.objects.filter(
+            user=OuterRef('pk'), author_id=author_id)),
+    ).values('is_favorited', 'is_in_shopping_cart', 'is_subscribed').get()
+
+
+def get_recipe_bundle(recipe_id, request):
+    """Возвращает данные для страницы рецепта или None, если его нет."""
+    part = get_recipe_part(recipe_id)
+    if part is None:
+        return None
+    recipe = dict(part['recipe'])
+    author = dict(get_author_part(recipe['author']))
+    flags = get_viewer_flags(request.user, recipe_id, author['id'])
+    recipe['is_favorited'] = flags['is_favorited']
+    recipe['is_in_shopping_cart'] = flags['is_in_shopping_cart']
+    if recipe['image']:
+        recipe['image'] = request.build_absolute_uri(recipe['image'])
+    profile = {name: author[name] for name in AUTHOR_VALUES_FIELDS}
+    profile['is_subscribed'] = flags['is_subscribed']
+    recipe['author'] = profile
+    bundle = {
+        'recipe': recipe,
+        'author': dict(profile, recipes_count=author['recipes_count']),
+    }
+    for name, _ in RELATED_KINDS:
+        bundle[name] = part[name]
+    return bundle
+
+
+def invalidate_recipes(recipe_ids):
+    keys = [RECIPE_KEY.format(recipe_id) for recipe_id in recipe_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_author(author_id):
+    key = AUTHOR_KEY.format(author_id)
+    transaction.on_commit(lambda: cache.delete(key))
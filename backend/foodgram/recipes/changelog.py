@@ -0,0 +1,124 @@
+"""Журнал изменений для инкрементальной синхронизации клиентов.
+
+Каждое изменение рецепта (включая его ингредиенты и теги), тега,
+избранного и списка покупок пишется в ``ChangeLog`` в той же
+транзакции, что и само изменение. id записи служит курсором: клиент
+запрашивает ``/api/changes/?since=<cursor>`` и получает последние
+состояния объектов, изменившихся после курсора, и id удалённых.
+
+Записи избранного и списка покупок видны только их владельцу.
+
+Записи отдаются с задержкой ``CHANGELOG_SAFETY_SECONDS``: транзакция,
+начатая раньше, может зафиксироваться позже, и без задержки клиент
+перескочил бы её запись. Команда ``compact_changelog`` удаляет
+записи, у которых есть более новая запись о том же объекте, поэтому
+журнал растёт с числом объектов, а не изменений.
+
+Массовые операции сигналов не отправляют и пишут журнал явно.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .fastpath import get_recipe_values_fields, serialize_recipes
+from .models import ChangeLog, Favorite, Recipe, ShoppingCart, Tag
+
+CHANGE_RECIPE_FIELDS = ('id', 'tags', 'author', 'ingredients',
+                        'name', 'image', 'text', 'cooking_time')
+CHANGE_COLLAPSED_FIELDS = ('tags', 'author')
+USER_RECIPE_KINDS = {
+    Favorite: ChangeLog.FAVORITE,
+    ShoppingCart: ChangeLog.SHOPPING_CART,
+}
+SECTIONS = {
+    ChangeLog.RECIPE: 'recipes',
+    ChangeLog.TAG: 'tags',
+    ChangeLog.FAVORITE: 'favorites',
+    ChangeLog.SHOPPING_CART: 'shopping_cart',
+}
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
+
+def log_change(kind, object_id, action, user_id=None):
+    ChangeLog.objects.create(
+        kind=kind, object_id=object_id, action=action, user_id=user_id)
+
+
+def log_user_recipes(model, user, recipe_ids, action):
+    ChangeLog.objects.bulk_create([
+        ChangeLog(kind=USER_RECIPE_KINDS[model], object_id=recipe_id,
+                  action=action, user=user)
+        for recipe_id in recipe_ids])
+
+
+def get_visible_entries(user):
+    deadline = timezone.now() - timedelta(
+        seconds=settings.CHANGELOG_SAFETY_SECONDS)
+    entries = ChangeLog.objects.filter(created__lte=deadline)
+    if user.is_authenticated:
+        return entries.filter(Q(user__isnull=True) | Q(user=user))
+    return entries.filter(user__isnull=True)
+
+
+def get_changes(request, since, limit=DEFAULT_LIMIT):
+    """Изменения после курсора ``since``.
+
+    Без ``since`` возвращает только текущий курсор: клиент сначала
+    загружает данные целиком, а потом синхронизируется от него.
+    """
+    entries = get_visible_entries(request.user)
+    changes = {'cursor': since, 'has_more': False}
+    for kind, section in SECTIONS.items():
+        changes[section] = {'upserts': [], 'deleted': []}
+    if since is None:
+        changes['cursor'] = entries.order_by('-id').values_list(
+            'id', flat=True).first() or 0
+        return changes
+
+    rows = list(entries.filter(id__gt=since).order_by('id').values_list(
+        'id', 'kind', 'object_id', 'action')[:limit + 1])
+    changes['has_more'] = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        changes['cursor'] = rows[-1][0]
+    latest = OrderedDict()
+    for _, kind, object_id, action in rows:
+        latest.pop((kind, object_id), None)
+        latest[(kind, object_id)] = action
+
+    upserts = {kind: [] for kind in SECTIONS}
+    for (kind, object_id), action in latest.items():
+        if action == ChangeLog.UPSERT:
+            upserts[kind].append(object_id)
+        else:
+            changes[SECTIONS[kind]]['deleted'].append(object_id)
+
+    if upserts[ChangeLog.RECIPE]:
+        changes['recipes']['upserts'] = serialize_recipes(
+            Recipe.objects.filter(id__in=upserts[ChangeLog.RECIPE]).values(
+                *get_recipe_values_fields(CHANGE_RECIPE_FIELDS)),
+            request, CHANGE_RECIPE_FIELDS, CHANGE_COLLAPSED_FIELDS)
+    if upserts[ChangeLog.TAG]:
+        changes['tags']['upserts'] = list(Tag.objects.filter(
+            id__in=upserts[ChangeLog.TAG]).values(
+            'id', 'name', 'color', 'slug'))
+    # Для избранного и списка покупок достаточно id рецептов.
+    for kind in (ChangeLog.FAVORITE, ChangeLog.SHOPPING_CART):
+        changes[SECTIONS[kind]]['upserts'] = upserts[kind]
+    return changes
+
+
+def compact_changelog():
+    """Удаляет записи, перекрытые более новыми записями о том же объекте."""
+    newer = ChangeLog.objects.filter(
+        kind=OuterRef('kind'), object_id=OuterRef('object_id'),
+        id__gt=OuterRef('id'))
+    public, _ = ChangeLog.objects.filter(user__isnull=True).filter(
+        Exists(newer.filter(user__isnull=True))).delete()
+    private, _ = ChangeLog.objects.filter(user__isnull=False).filter(
+        Exists(newer.filter(user=OuterRef('user')))).delete()
+    return public + private
@@ -0,0 +1,103 @@
+"""Счётчики рецептов по тегам для фильтров ленты.
+
+Без фильтров число рецептов каждого тега читается из ``TagFacet``.
+Счётчики обновляют сигналы при изменении тегов рецепта и удалении
+рецепта, поэтому запрос не группирует всю таблицу связей. С фильтрами
+счётчики считаются одним сгруппированным запросом по отфильтрованным
+рецептам.
+
+Фильтр по тегам объединяет теги через ИЛИ, поэтому при подсчёте
+тегов он не применяется: иначе у невыбранных тегов всегда был бы
+ноль. Счётчики избранного и списка покупок учитывают все фильтры.
+
+Массовые операции сигналов не отправляют, после них счётчики
+пересчитывает ``rebuild_tag_facets``.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, QuerySet
+from django.db.models.functions import Coalesce
+
+from .filters import RecipeFilter
+from .models import Favorite, Recipe, ShoppingCart, Tag, TagFacet
+
+TAG_FILTER = 'tags'
+IGNORED_FILTERS = ('ordering',)
+
+
+def change_tag_counts(deltas):
+    """Прибавляет к счётчикам ``{id тега: изменение}``."""
+    by_delta = defaultdict(list)
+    for tag_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(tag_id)
+    for delta, tag_ids in by_delta.items():
+        TagFacet.objects.filter(tag_id__in=tag_ids).update(
+            recipes_count=F('recipes_count') + delta)
+
+
+def count_tag_links(**lookups):
+    return Counter(Recipe.tags.through.objects.filter(
+        **lookups).values_list('tag_id', flat=True))
+
+
+def rebuild_tag_facets():
+    counts = dict(Tag.objects.order_by().annotate(
+        count=Count('recipes')).values_list('id', 'count'))
+    facets = TagFacet.objects.in_bulk(list(counts))
+    TagFacet.objects.bulk_create([
+        TagFacet(tag_id=tag_id, recipes_count=count)
+        for tag_id, count in counts.items() if tag_id not in facets])
+    changed = [facet for facet in facets.values()
+               if facet.recipes_count != counts[facet.tag_id]]
+    for facet in changed:
+        facet.recipes_count = counts[facet.tag_id]
+    TagFacet.objects.bulk_update(changed, ['recipes_count'])
+    return len(counts)
+
+
+def is_active(value):
+    if isinstance(value, (list, tuple, QuerySet)):
+        return bool(value)
+    return value is not None and value is not False and value != ''
+
+
+def get_active_filters(filterset):
+    return {name for name, value in filterset.form.cleaned_data.items()
+            if name not in IGNORED_FILTERS and is_active(value)}
+
+
+def get_recipe_facets(request):
+    filterset = RecipeFilter(
+        request.query_params, queryset=Recipe.objects.all(), request=request)
+    recipes = filterset.qs
+    active = get_active_filters(filterset)
+    untagged = recipes
+    if TAG_FILTER in active:
+        params = request.query_params.copy()
+        params.pop(TAG_FILTER)
+        untagged = RecipeFilter(
+            params, queryset=Recipe.objects.all(), request=request).qs
+
+    if active - {TAG_FILTER}:
+        # Группируются только связи отфильтрованных рецептов.
+        counts = dict(Recipe.tags.through.objects.filter(
+            recipe__in=untagged.values('id')).order_by().values(
+            'tag_id').annotate(count=Count('id')).values_list(
+            'tag_id', 'count'))
+        tags = [dict(tag, count=counts.get(tag['id'], 0))
+                for tag in Tag.objects.order_by('name').values('id', 'slug')]
+    else:
+        tags = list(Tag.objects.order_by('name').values(
+            'id', 'slug', count=Coalesce(F('facet__recipes_count'), 0)))
+    facets = {'tags': tags}
+
+    user = request.user
+    if user.is_authenticated:
+        for name, model in (('is_favorited', Favorite),
+                            ('is_in_shopping_cart', ShoppingCart)):
+            links = model.objects.filter(user=user)
+            if active:
+                links = links.filter(recipe__in=recipes.values('id'))
+            facets[name] = links.count()
+    return facets
@@ -0,0 +1,25 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.functional import cached_property
+from rest_framework import serializers
+
+
+class Base64ImageField(serializers.ImageField):
+    """``Base64ImageField`` из drf_extra_fields, загружаемый при записи.
+
+    drf_extra_fields при импорте тянет psycopg2.extras и
+    django.contrib.postgres, а Pillow нужен только для разбора картинки.
+    Чтение отдаёт URL как обычный ``ImageField``, поэтому воркер,
+    который обслуживает только чтение, эти модули не загружает.
+    """
+
+    @cached_property
+    def decoder(self):
+        from drf_extra_fields.fields import Base64ImageField
+        return Base64ImageField(*self._args, **self._kwargs)
+
+    def to_internal_value(self, data):
+        # drf_extra_fields сообщает об ошибке исключением Django.
+        try:
+            return self.decoder.to_internal_value(data)
+        except DjangoValidationError:
+            self.fail('invalid_image')
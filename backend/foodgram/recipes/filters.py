@@ -10,6 +10,16 @@ class RecipeFilter(django_filters.FilterSet):
         queryset=Tag.objects.all()
     )
 
+    max_calories = django_filters.NumberFilter(
+        field_name='total_calories', lookup_expr='lte')
+    max_cost = django_filters.NumberFilter(
+        field_name='total_cost', lookup_expr='lte')
+    ordering = django_filters.OrderingFilter(fields=(
+        ('pub_date', 'pub_date'),
+        ('total_calories', 'calories'),
+        ('total_cost', 'cost'),
+    ))
+
     is_favorited = django_filters.BooleanFilter(method='get_favorite')
     is_in_shopping_cart = django_filters.BooleanFilter(
         method='get_is_in_shopping_cart')
@@ -17,14 +27,14 @@ class RecipeFilter(django_filters.FilterSet):
     def get_favorite(self, queryset, name, value):
         user = self.request.user
         if value:
-            return Recipe.objects.filter(favorite_recipe__user=user)
-        return Recipe.objects.all()
+            return queryset.filter(favorite_recipe__user=user)
+        return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
         if value:
-            return Recipe.objects.filter(in_shopping_cart__user=user)
-        return Recipe.objects.all()
+            return queryset.filter(in_shopping_cart__user=user)
+        return queryset
 
     class Meta:
         model = Recipe
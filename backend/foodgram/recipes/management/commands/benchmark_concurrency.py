@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+from foodgram.handlers import FoodgramASGIHandler
+
+WARMUP_REQUESTS = 20
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность одного воркера под WSGI '
+            '(gunicorn sync, запросы по одному или в --threads потоках) и '
+            'под ASGI с FoodgramASGIHandler при --concurrency '
+            'одновременных клиентах. --query-delay добавляет задержку к '
+            'каждому SQL-запросу, как у сетевой базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*',
+                            default=['/api/recipes/', '/api/tags/'])
+        parser.add_argument('--requests', type=int, default=400,
+                            help='Сколько запросов к каждому URL.')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Сколько клиентов шлют запросы одновременно.')
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Потоки WSGI-воркера (--threads gunicorn).')
+        parser.add_argument('--query-delay', type=float, default=0,
+                            help='Задержка каждого SQL-запроса, мс.')
+
+    def handle(self, *args, **options):
+        delay = options['query_delay'] / 1000
+
+        def slow_execute(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            # Объект соединения переживает переподключения.
+            if slow_execute not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_execute)
+
+        if delay:
+            # Соединения открываются заново в каждом потоке, и обёртка
+            # ставится на все.
+            connections.close_all()
+            connection_created.connect(add_delay)
+        try:
+            for url in options['urls']:
+                for name, run in (('WSGI', self.run_wsgi),
+                                  ('ASGI', self.run_asgi)):
+                    run(url, WARMUP_REQUESTS, options)
+                    started = time.perf_counter()
+                    timings = run(url, options['requests'], options)
+                    elapsed = time.perf_counter() - started
+                    self.report(name, url, timings, elapsed)
+        finally:
+            connection_created.disconnect(add_delay)
+
+    def run_wsgi(self, url, count, options):
+        handler = WSGIHandler()
+        path, _, query = url.partition('?')
+        # Воркер обрабатывает не больше --threads запросов сразу,
+        # остальные клиенты ждут, и ожидание входит во время ответа.
+        worker = threading.Semaphore(options['threads'])
+
+        def request(_):
+            environ = RequestFactory()._base_environ(
+                PATH_INFO=path, QUERY_STRING=query, REQUEST_METHOD='GET')
+            started = time.perf_counter()
+            with worker:
+                response = handler(environ, lambda status, headers: None)
+                b''.join(response)
+                response.close()
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(options['concurrency']) as clients:
+            return list(clients.map(request, range(count)))
+
+    def run_asgi(self, url, count, options):
+        handler = FoodgramASGIHandler()
+        path, _, query = url.partition('?')
+        scope = {
+            'type': 'http', 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'root_path': '',
+            'query_string': query.encode(), 'headers': [],
+            'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            pass
+
+        async def client(queue, timings):
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                await handler(dict(scope), receive, send)
+                timings.append(time.perf_counter() - started)
+
+        async def main():
+            queue = asyncio.Queue()
+            for index in range(count):
+                queue.put_nowait(index)
+            timings = []
+            await asyncio.gather(*(client(queue, timings) for _ in range(
+                options['concurrency'])))
+            return timings
+
+        return asyncio.run(main())
+
+    def report(self, name, url, timings, elapsed):
+        timings = sorted(timing * 1000 for timing in timings)
+        self.stdout.write(
+            f'{name} {url}: {len(timings) / elapsed:.0f} запросов/с, '
+            f'p50 {timings[len(timings) // 2]:.0f} мс, '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:.0f} мс')
@@ -0,0 +1,76 @@
+import statistics
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+URLS = ('/api/tags/', '/api/recipes/?page=1&limit=6',
+        '/api/ingredients/?search=%D0%BC')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время ответа с новым соединением с БД на каждый '
+            'запрос (CONN_MAX_AGE=0) и с постоянным соединением. Запросы '
+            'идут через WSGI-обработчик, поэтому соединения закрываются '
+            'так же, как в gunicorn.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300,
+                            help='Сколько запросов в каждом режиме.')
+        parser.add_argument('--max-age', type=int, default=60,
+                            help='CONN_MAX_AGE для постоянных соединений.')
+        parser.add_argument('--host',
+                            help='Хост БД вместо DB_HOST, например '
+                                 'pgbouncer для замера через пул.')
+
+    def handle(self, *args, **options):
+        settings_dict = connections['default'].settings_dict
+        saved = dict(settings_dict)
+        if options['host']:
+            settings_dict['HOST'] = options['host']
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            if connection.alias == 'default':
+                opened.append(connection)
+
+        connection_created.connect(count_connection)
+        handler = WSGIHandler()
+        try:
+            for name, max_age in (('без пула', 0),
+                                  ('постоянные', options['max_age'])):
+                connections['default'].close()
+                settings_dict['CONN_MAX_AGE'] = max_age
+                self.request(handler, URLS[0])
+                opened.clear()
+                timings = [self.request(handler, URLS[index % len(URLS)])
+                           for index in range(options['requests'])]
+                self.report(name, max_age, timings, len(opened))
+        finally:
+            connection_created.disconnect(count_connection)
+            connections['default'].close()
+            settings_dict.clear()
+            settings_dict.update(saved)
+
+    def request(self, handler, url):
+        path, _, query = url.partition('?')
+        environ = RequestFactory()._base_environ(
+            PATH_INFO=path, QUERY_STRING=query, REQUEST_METHOD='GET')
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers: None)
+        b''.join(response)
+        # close() отправляет request_finished, как сервер после ответа.
+        response.close()
+        return time.perf_counter() - started
+
+    def report(self, name, max_age, timings, opened):
+        timings = sorted(timing * 1000 for timing in timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{name} (CONN_MAX_AGE={max_age}): {len(timings)} запросов, '
+            f'среднее {statistics.mean(timings):.2f} мс, медиана '
+            f'{statistics.median(timings):.2f} мс, p95 {p95:.2f} мс, '
+            f'открыто соединений {opened}')
@@ -0,0 +1,101 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from foodgram.renderers import FastJSONRenderer
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.serializers import (IngredientSerializer, RecipeSerializer,
+                                 TagSerializer)
+from recipes.views import RecipeViewSet
+
+User = get_user_model()
+
+RECIPE_QUERIES = ('', 'compact=1', 'compact=1&expand=author,ingredients',
+                  'fields=id,name,text,ingredients',
+                  'fields=id,name,total_calories,total_proteins,total_cost')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает вывод быстрых списков с ModelSerializer '
+            'и замеряет скорость сериализации.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100,
+                            help='Сколько объектов брать для замера.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--user', help='email пользователя-зрителя.')
+
+    def handle(self, *args, **options):
+        user = AnonymousUser()
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError('Пользователь не найден.')
+        request = self.get_request('/api/', user)
+        limit = options['limit']
+        repeat = options['repeat']
+        mismatches = 0
+
+        cases = [
+            ('tags', Tag.objects.all()[:limit], TagSerializer, {},
+             lambda rows: list(rows.values('id', 'name', 'color', 'slug'))),
+            ('ingredients', Ingredient.objects.all()[:limit],
+             IngredientSerializer, {},
+             lambda rows: list(rows.values('id', 'name',
+                                           'measurement_unit'))),
+        ]
+        ids = list(Recipe.objects.values_list('id', flat=True)[:limit])
+        for query in RECIPE_QUERIES:
+            view = RecipeViewSet(
+                action='list', format_kwarg=None,
+                request=self.get_request(f'/api/recipes/?{query}', user))
+            cases.append((
+                f'recipes?{query}',
+                view.get_queryset().filter(id__in=ids),
+                RecipeSerializer,
+                view.get_serializer_context(),
+                lambda rows, view=view: view.build_rows(
+                    view.get_values_queryset().filter(id__in=ids)),
+            ))
+
+        for name, queryset, serializer_class, context, fast in cases:
+            context = dict(context, request=context.get('request', request))
+
+            def slow():
+                return JSONRenderer().render(serializer_class(
+                    queryset.all(), many=True, context=context).data)
+
+            def quick():
+                return FastJSONRenderer().render(fast(queryset.all()))
+
+            expected, actual = slow(), quick()
+            if expected != actual:
+                mismatches += 1
+                self.stderr.write(f'{name}: ответы различаются')
+            count = queryset.count()
+            slow_time = self.measure(slow, repeat)
+            quick_time = self.measure(quick, repeat)
+            self.stdout.write(
+                f'{name}: {count} объектов, {len(expected)} байт, '
+                f'serializer {count / slow_time:.0f} объектов/с, '
+                f'fast path {count / quick_time:.0f} объектов/с, '
+                f'ускорение x{slow_time / quick_time:.1f}')
+        if mismatches:
+            raise CommandError(f'Несовпадений: {mismatches}')
+
+    def get_request(self, path, user):
+        request = Request(APIRequestFactory().get(path))
+        request.user = user
+        return request
+
+    def measure(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Recipe
+
+User = get_user_model()
+
+ENCODINGS = (('identity', 'identity'), ('gzip', 'gzip'),
+             ('br', 'br, gzip'))
+
+
+class Command(BaseCommand):
+    help = ('Считает байты, переданные за типичный сценарий фронтенда, '
+            'без сжатия, с gzip, с brotli и при повторных запросах с ETag.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='email пользователя-зрителя.')
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError('Пользователь не найден.')
+            token, _ = Token.objects.get_or_create(user=user)
+            headers['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+
+        urls = ['/api/tags/', '/api/recipes/?page=1&limit=6',
+                '/api/recipes/?page=2&limit=6',
+                '/api/ingredients/?search=%D0%BC']
+        urls += [f'/api/recipes/{recipe_id}/' for recipe_id in
+                 Recipe.objects.values_list('id', flat=True)[:3]]
+
+        client = Client()
+        for name, accept_encoding in ENCODINGS:
+            total = revalidated = 0
+            for url in urls:
+                response = client.get(
+                    url, HTTP_ACCEPT_ENCODING=accept_encoding, **headers)
+                total += len(response.content)
+                etag = response.get('ETag')
+                if etag:
+                    response = client.get(
+                        url, HTTP_ACCEPT_ENCODING=accept_encoding,
+                        HTTP_IF_NONE_MATCH=etag, **headers)
+                revalidated += len(response.content)
+            self.stdout.write(
+                f'{name}: {len(urls)} запросов, {total} байт, '
+                f'повторно с If-None-Match {revalidated} байт')
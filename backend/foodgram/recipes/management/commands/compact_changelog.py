@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.changelog import compact_changelog
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из журнала изменений записи, перекрытые более новыми '
+            'записями о том же объекте.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        deleted = compact_changelog()
+        self.stdout.write(
+            f'Удалено записей: {deleted}, '
+            f'{time.perf_counter() - started:.2f} с')
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.snapshot import export_snapshot
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, теги, ингредиенты, рецепты и связи '
+            'в каталог снимка (NDJSON.gz на модель и картинки по sha256).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Каталог снимка.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        manifest = export_snapshot(
+            options['path'], batch_size=options['batch_size'],
+            report=self.report)
+        total = sum(item['rows'] for item in manifest['models'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Всего: {total} строк за {elapsed:.2f} с, '
+            f'{total / max(elapsed, 1e-6):.0f} строк/с')
+        if manifest['missing_images']:
+            self.stderr.write(
+                f'Не найдено картинок: {manifest["missing_images"]}')
+
+    def report(self, label, rows, seconds):
+        self.stdout.write(
+            f'{label}: {rows} строк, {rows / max(seconds, 1e-6):.0f} строк/с')
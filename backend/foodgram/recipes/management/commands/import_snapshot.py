@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.snapshot import import_snapshot
+from recipes.tasks import update_recommendations, update_similarity
+
+
+class Command(BaseCommand):
+    help = ('Загружает снимок, сделанный export_snapshot. Пользователи, '
+            'теги, ингредиенты и рецепты (по автору и названию) '
+            'сопоставляются с уже существующими.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Каталог снимка.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.total = 0
+        started = time.perf_counter()
+        try:
+            import_snapshot(options['path'],
+                            batch_size=options['batch_size'],
+                            report=self.report)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Всего: {self.total} строк за {elapsed:.2f} с, '
+            f'{self.total / max(elapsed, 1e-6):.0f} строк/с')
+        update_similarity.delay()
+        update_recommendations.delay()
+
+    def report(self, label, rows, created, seconds):
+        self.total += rows
+        self.stdout.write(
+            f'{label}: {rows} строк, создано {created}, '
+            f'{rows / max(seconds, 1e-6):.0f} строк/с')
@@ -0,0 +1,68 @@
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import Ingredient
+from recipes.nutrition import update_ingredient_totals
+
+NUTRITION_FIELDS = ('calories', 'proteins', 'price')
+
+
+class Command(BaseCommand):
+    help = ('Загружает ингредиенты из JSON в формате data/ingredients.json. '
+            'Необязательные ключи calories, proteins и price задают '
+            'значения на единицу измерения; итоги затронутых рецептов '
+            'пересчитываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к JSON-файлу.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8') as source:
+                items = json.load(source)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+        with transaction.atomic():
+            existing = {
+                (ingredient.name, ingredient.measurement_unit): ingredient
+                for ingredient in Ingredient.objects.all()}
+            new = []
+            changed = {}
+            for item in items:
+                key = (item['name'], item['measurement_unit'])
+                values = self.get_nutrition(item)
+                ingredient = existing.get(key)
+                if ingredient is None:
+                    existing[key] = Ingredient(
+                        name=item['name'],
+                        measurement_unit=item['measurement_unit'], **values)
+                    new.append(existing[key])
+                    continue
+                for name, value in values.items():
+                    if getattr(ingredient, name) != value:
+                        setattr(ingredient, name, value)
+                        if ingredient.pk is not None:
+                            changed[ingredient.pk] = ingredient
+            Ingredient.objects.bulk_create(new)
+            Ingredient.objects.bulk_update(
+                list(changed.values()), NUTRITION_FIELDS, batch_size=1000)
+            # bulk_update не отправляет сигналы, итоги считаем здесь.
+            update_ingredient_totals(list(changed))
+
+        self.stdout.write(
+            f'Добавлено ингредиентов: {len(new)}, обновлены данные '
+            f'о питательности и цене: {len(changed)}, '
+            f'{time.perf_counter() - started:.2f} с')
+
+    def get_nutrition(self, item):
+        values = {name: item[name] for name in NUTRITION_FIELDS
+                  if name in item}
+        if values.get('price') is not None:
+            values['price'] = Decimal(str(values['price']))
+        return values
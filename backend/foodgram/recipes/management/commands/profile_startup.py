@@ -0,0 +1,122 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Запускается в отдельном процессе: в текущем всё уже импортировано.
+# Повторяет загрузку воркера gunicorn: настройки и приложения, WSGI
+# с middleware и первое обращение к URL, которое строит резолвер.
+BOOT_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+import django
+from django.core.wsgi import get_wsgi_application
+from django.urls import Resolver404, get_resolver
+imported = time.perf_counter()
+django.setup(set_prefix=False)
+setup = time.perf_counter()
+get_wsgi_application()
+wsgi = time.perf_counter()
+try:
+    get_resolver().resolve('/api/')
+except Resolver404:
+    pass
+resolver = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'setup': setup - imported,
+    'wsgi': wsgi - setup,
+    'resolver': resolver - wsgi,
+    'total': resolver - started,
+}))
+'''
+STAGES = ('import', 'setup', 'wsgi', 'resolver', 'total')
+
+
+def parse_importtime(output):
+    """Строки ``-X importtime``: (модуль, своё время, с вложенными), мкс."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = ('Замеряет загрузку воркера в отдельном процессе: время '
+            'импорта модулей, настройки приложений, WSGI и построения '
+            'резолвера URL.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Сколько раз запускать процесс.')
+        parser.add_argument('--top', type=int, default=20,
+                            help='Сколько самых медленных модулей показать.')
+        parser.add_argument('--max-total', type=float,
+                            help='Порог времени загрузки в мс, выше него '
+                                 'команда завершается с ошибкой.')
+        parser.add_argument('--output',
+                            help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        runs = []
+        modules = None
+        for _ in range(max(options['repeat'], 1)):
+            # Первый запуск только с -X importtime: он сам замедляет импорт,
+            # поэтому его время в замер не идёт.
+            if modules is None:
+                modules = parse_importtime(self.boot(importtime=True)[1])
+            runs.append(json.loads(self.boot()[0].splitlines()[-1]))
+
+        timings = {stage: statistics.median(run[stage] for run in runs) * 1000
+                   for stage in STAGES}
+        self.stdout.write(
+            f'Загрузка воркера, медиана {len(runs)} запусков: ' + ', '.join(
+                f'{stage} {timings[stage]:.0f} мс' for stage in STAGES))
+
+        packages = defaultdict(int)
+        for name, own, _ in modules:
+            packages[name.split('.')[0]] += own
+        top_packages = sorted(packages.items(), key=lambda item: -item[1])
+        self.stdout.write('Пакеты по собственному времени импорта:')
+        for name, own in top_packages[:options['top']]:
+            self.stdout.write(f'  {own / 1000:8.1f} мс  {name}')
+        top_modules = sorted(modules, key=lambda item: -item[2])
+        self.stdout.write('Модули по времени импорта с зависимостями:')
+        for name, _, cumulative in top_modules[:options['top']]:
+            self.stdout.write(f'  {cumulative / 1000:8.1f} мс  {name}')
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'timings_ms': timings,
+                    'packages_ms': {name: own / 1000
+                                    for name, own in top_packages},
+                    'modules': [name for name, _, _ in modules],
+                }, output, indent=2, ensure_ascii=False)
+        if options['max_total'] and timings['total'] > options['max_total']:
+            raise CommandError(
+                f'Загрузка {timings["total"]:.0f} мс, '
+                f'порог {options["max_total"]:.0f} мс')
+
+    def boot(self, importtime=False):
+        command = [sys.executable]
+        if importtime:
+            command += ['-X', 'importtime']
+        env = dict(os.environ,
+                   DJANGO_SETTINGS_MODULE=os.environ.get(
+                       'DJANGO_SETTINGS_MODULE', 'foodgram.settings'))
+        result = subprocess.run(
+            command + ['-c', BOOT_SCRIPT], cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+        if result.returncode:
+            raise CommandError(result.stderr)
+        return result.stdout, result.stderr
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.recommendations import NEIGHBORS_COUNT, rebuild_recommendations
+
+
+class Command(BaseCommand):
+    help = ('Обновляет рекомендации «с этим рецептом также добавляют '
+            'в избранное» по новым записям избранного.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересобрать рекомендации для всех рецептов.')
+        parser.add_argument(
+            '--with-shopping-cart', action='store_true',
+            help='Учитывать список покупок с меньшим весом.')
+        parser.add_argument('--count', type=int, default=NEIGHBORS_COUNT,
+                            help='Сколько рекомендаций хранить для рецепта.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stats = rebuild_recommendations(
+            full=options['full'],
+            with_shopping_cart=options['with_shopping_cart'],
+            count=options['count'])
+        self.stdout.write(
+            f'Рецептов с оценками: {stats["recipes"]}, '
+            f'пересчитано списков: {stats["recomputed"]}, '
+            f'{time.perf_counter() - started:.2f} с')
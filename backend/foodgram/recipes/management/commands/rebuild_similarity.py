@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import NEIGHBORS_COUNT, rebuild_similarity
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает векторы рецептов и списки похожих рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать всё, а не только изменившиеся рецепты.')
+        parser.add_argument('--count', type=int, default=NEIGHBORS_COUNT,
+                            help='Сколько соседей хранить для рецепта.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stats = rebuild_similarity(full=options['full'],
+                                   count=options['count'])
+        self.stdout.write(
+            f'Рецептов: {stats["recipes"]}, обновлено векторов: '
+            f'{stats["vectors"]}, пересчитано списков: '
+            f'{stats["recomputed"]}, дополнено списков: {stats["merged"]}, '
+            f'{time.perf_counter() - started:.2f} с')
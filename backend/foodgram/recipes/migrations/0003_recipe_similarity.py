@@ -0,0 +1,45 @@
+# Generated by Django 3.0.5 on 2026-10-19 19:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_shoppingcart_servings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeVector',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='vector', serialize=False, to='recipes.Recipe', verbose_name='Рецепт')),
+                ('ingredients', models.BinaryField(verbose_name='id ингредиентов (int32)')),
+                ('tags', models.BinaryField(verbose_name='id тегов (int32)')),
+            ],
+            options={
+                'verbose_name': 'Вектор рецепта',
+                'verbose_name_plural': 'Векторы рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeNeighbors',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('similar', 'Похожие рецепты')], max_length=20, verbose_name='Тип')),
+                ('neighbor_ids', models.BinaryField(verbose_name='id соседей (int32)')),
+                ('scores', models.BinaryField(verbose_name='Оценки (float32)')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='recipes.Recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Соседи рецепта',
+                'verbose_name_plural': 'Соседи рецептов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipeneighbors',
+            constraint=models.UniqueConstraint(fields=('recipe', 'kind'), name='unique_recipe_neighbors'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.0.5 on 2026-10-19 19:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommenderState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('similar', 'Похожие рецепты'), ('also_favorited', 'С этим рецептом также добавляют в избранное')], max_length=20, unique=True, verbose_name='Тип')),
+                ('last_favorite_id', models.PositiveIntegerField(default=0, verbose_name='Последнее учтённое избранное')),
+                ('last_shopping_cart_id', models.PositiveIntegerField(default=0, verbose_name='Последний учтённый рецепт в списке покупок')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Состояние рекомендаций',
+                'verbose_name_plural': 'Состояния рекомендаций',
+            },
+        ),
+        migrations.AlterField(
+            model_name='recipeneighbors',
+            name='kind',
+            field=models.CharField(choices=[('similar', 'Похожие рецепты'), ('also_favorited', 'С этим рецептом также добавляют в избранное')], max_length=20, verbose_name='Тип'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.0.5 on 2026-10-19 19:42
+
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    # Поиск ингредиентов идёт по UPPER(name) LIKE '%...%' (icontains),
+    # такой запрос ускоряет только триграммный индекс PostgreSQL.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS ingredient_name_trgm_idx '
+        'ON recipes_ingredient USING gin (UPPER(name) gin_trgm_ops)')
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS ingredient_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recommender_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='amount',
+            index=models.Index(fields=['ingredient', 'recipe'], name='amount_ingredient_recipe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['name', 'measurement_unit'], name='ingredient_name_unit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', 'id'], name='recipe_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscribe',
+            index=models.Index(fields=['author', 'user'], name='subscribe_author_user_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.0.5 on 2026-10-19 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='calories',
+            field=models.FloatField(blank=True, null=True, verbose_name='Калорийность на единицу измерения, ккал'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=12, null=True, verbose_name='Цена за единицу измерения, руб.'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='proteins',
+            field=models.FloatField(blank=True, null=True, verbose_name='Белки на единицу измерения, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='total_calories',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True, verbose_name='Калорийность, ккал'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='total_cost',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True, verbose_name='Стоимость, руб.'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='total_proteins',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Белки, г'),
+        ),
+    ]
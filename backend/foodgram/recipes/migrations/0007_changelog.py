@@ -0,0 +1,36 @@
+# Generated by Django 3.0.5 on 2026-10-19 19:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0006_nutrition_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('recipe', 'Рецепт'), ('tag', 'Тег'), ('favorite', 'Избранное'), ('shopping_cart', 'Список покупок')], max_length=20, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('action', models.CharField(choices=[('upsert', 'Создан или изменён'), ('delete', 'Удалён')], max_length=10, verbose_name='Действие')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('user', models.ForeignKey(blank=True, help_text='Для избранного и списка покупок: чьё это изменение.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала изменений',
+                'verbose_name_plural': 'Журнал изменений',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['kind', 'object_id'], name='changelog_kind_object_idx'),
+        ),
+    ]
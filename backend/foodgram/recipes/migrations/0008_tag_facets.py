@@ -0,0 +1,36 @@
+# Generated by Django 3.0.5 on 2026-10-19 19:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_tag_facets(apps, schema_editor):
+    Tag = apps.get_model('recipes', 'Tag')
+    TagFacet = apps.get_model('recipes', 'TagFacet')
+    TagFacet.objects.bulk_create([
+        TagFacet(tag_id=tag_id, recipes_count=count)
+        for tag_id, count in Tag.objects.order_by().annotate(
+            count=Count('recipes')).values_list('id', 'count')])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_changelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagFacet',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='facet', serialize=False, to='recipes.Tag', verbose_name='Тег')),
+                ('recipes_count', models.PositiveIntegerField(default=0, verbose_name='Число рецептов')),
+            ],
+            options={
+                'verbose_name': 'Счётчик рецептов тега',
+                'verbose_name_plural': 'Счётчики рецептов тегов',
+            },
+        ),
+        migrations.RunPython(fill_tag_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.0.5 on 2026-10-19 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_tag_facets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True, verbose_name='Ключ')),
+                ('scope', models.CharField(max_length=50, verbose_name='Область')),
+                ('tokens', models.FloatField(verbose_name='Токены')),
+                ('updated', models.FloatField(verbose_name='Обновлено (unix-время)')),
+            ],
+            options={
+                'verbose_name': 'Корзина токенов',
+                'verbose_name_plural': 'Корзины токенов',
+            },
+        ),
+        migrations.CreateModel(
+            name='ThrottleCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50, unique=True, verbose_name='Область')),
+                ('allowed', models.BigIntegerField(default=0, verbose_name='Пропущено')),
+                ('throttled', models.BigIntegerField(default=0, verbose_name='Отклонено')),
+            ],
+            options={
+                'verbose_name': 'Счётчик ограничений',
+                'verbose_name_plural': 'Счётчики ограничений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='throttlebucket',
+            index=models.Index(fields=['scope', 'updated'], name='throttle_scope_updated_idx'),
+        ),
+    ]
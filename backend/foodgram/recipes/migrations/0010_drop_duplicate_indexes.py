@@ -0,0 +1,21 @@
+# Generated by Django 3.0.5 on 2026-10-19 20:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_throttle_buckets'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='amount',
+            name='amount_ingredient_recipe_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='subscribe',
+            name='subscribe_author_user_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.5 on 2026-10-19 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_drop_duplicate_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='total_cost',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=14, null=True, verbose_name='Стоимость, руб.'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.0.5 on 2026-10-19 21:05
+
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    # Поиск в админке идёт по UPPER(name) LIKE 'x%' (istartswith),
+    # обычный btree по name для него не годится.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS recipe_name_trgm_idx '
+        'ON recipes_recipe USING gin (UPPER(name) gin_trgm_ops)')
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS recipe_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_total_cost_decimal'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,4 +1,11 @@
-from rest_framework import mixins, viewsets
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from rest_framework import mixins, status, viewsets
+from rest_framework.response import Response
+
+from .changelog import log_user_recipes
+from .models import ChangeLog, Recipe
+from .serializers import RecipeBatchSerializer
 
 
 class CustomViewSet(
@@ -6,3 +13,122 @@ class CustomViewSet(
         mixins.RetrieveModelMixin,
         viewsets.GenericViewSet):
     pass
+
+
+class ValuesListMixin:
+    """Список без ModelSerializer: строки ``.values()`` идут прямо в ответ.
+
+    Ключи ``values_fields`` должны совпадать с полями сериализатора
+    и идти в том же порядке.
+    """
+    values_fields = ()
+
+    def get_values_queryset(self):
+        return self.filter_queryset(
+            self.get_queryset()).values(*self.values_fields)
+
+    def build_rows(self, rows):
+        return list(rows)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_values_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.build_rows(page))
+        return Response(self.build_rows(queryset))
+
+
+class RecipeBatchMixin:
+    """Добавление и удаление списка рецептов за один запрос.
+
+    Модель связи задаётся атрибутом ``batch_model`` и должна иметь поля
+    ``user`` и ``recipe`` с уникальностью по этой паре.
+    """
+    batch_model = None
+    batch_serializer_class = RecipeBatchSerializer
+
+    def get_batch_data(self, request):
+        serializer = self.batch_serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def get_batch_ids(self, recipe_ids):
+        """Возвращает существующие рецепты и уже связанные с пользователем,
+        одним запросом."""
+        rows = Recipe.objects.filter(id__in=recipe_ids).order_by().annotate(
+            linked=Exists(self.batch_model.objects.filter(
+                user=self.request.user, recipe=OuterRef('pk')))
+        ).values_list('id', 'linked')
+        existing = set()
+        linked = set()
+        for recipe_id, is_linked in rows:
+            existing.add(recipe_id)
+            if is_linked:
+                linked.add(recipe_id)
+        return existing, linked
+
+    def get_batch_fields(self, data):
+        """Поля новых связей, кроме пользователя и рецепта."""
+        return {}
+
+    def perform_batch_create(self, objs):
+        """Добавляет связи и возвращает id рецептов, для которых связь
+        действительно вставлена."""
+        try:
+            with transaction.atomic():
+                self.batch_model.objects.bulk_create(objs)
+            inserted = objs
+        except IntegrityError:
+            # Часть связей успел добавить параллельный запрос: вставляем
+            # по одной и пропускаем существующие.
+            inserted = []
+            for obj in objs:
+                try:
+                    with transaction.atomic():
+                        self.batch_model.objects.bulk_create([obj])
+                except IntegrityError:
+                    continue
+                inserted.append(obj)
+        # bulk_create не отправляет post_save, журнал пишем явно.
+        log_user_recipes(self.batch_model, self.request.user,
+                         [obj.recipe_id for obj in inserted],
+                         ChangeLog.UPSERT)
+        return {obj.recipe_id for obj in inserted}
+
+    def batch_create(self, request, *args, **kwargs):
+        data = self.get_batch_data(request)
+        recipe_ids = data['recipes']
+        existing, linked = self.get_batch_ids(recipe_ids)
+        fields = self.get_batch_fields(data)
+        inserted = self.perform_batch_create(
+            [self.batch_model(user=request.user, recipe_id=recipe_id,
+                              **fields)
+             for recipe_id in recipe_ids
+             if recipe_id in existing and recipe_id not in linked])
+        results = []
+        for recipe_id in recipe_ids:
+            if recipe_id not in existing:
+                result = 'not_found'
+            elif recipe_id in inserted:
+                result = 'added'
+            else:
+                result = 'exists'
+            results.append({'id': recipe_id, 'result': result})
+        return Response(results, status=status.HTTP_200_OK)
+
+    def batch_destroy(self, request, *args, **kwargs):
+        recipe_ids = self.get_batch_data(request)['recipes']
+        existing, linked = self.get_batch_ids(recipe_ids)
+        if linked:
+            self.batch_model.objects.filter(
+                user=request.user, recipe_id__in=linked).delete()
+        results = []
+        for recipe_id in recipe_ids:
+            if recipe_id not in existing:
+                result = 'not_found'
+            elif recipe_id in linked:
+                result = 'removed'
+            else:
+                result = 'missing'
+            results.append({'id': recipe_id, 'result': result})
+        return Response(results, status=status.HTTP_200_OK)
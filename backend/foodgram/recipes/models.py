@@ -1,3 +1,6 @@
+import sys
+from array import array
+
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import models
@@ -5,6 +8,15 @@ from django.db import models
 User = get_user_model()
 
 
+def unpack_array(data, typecode):
+    """Читает массив, сохранённый numpy в little-endian (``<i4``, ``<f4``)."""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tolist()
+
+
 class Tag(models.Model):
     name = models.CharField('Тег', unique=True, max_length=200)
     color = models.CharField('Цветовой HEX-код', unique=True, max_length=200)
@@ -22,11 +34,22 @@ class Tag(models.Model):
 class Ingredient(models.Model):
     name = models.CharField('Ингредиент', max_length=200)
     measurement_unit = models.CharField('Единица изменения', max_length=200)
+    calories = models.FloatField(
+        'Калорийность на единицу измерения, ккал', blank=True, null=True)
+    proteins = models.FloatField(
+        'Белки на единицу измерения, г', blank=True, null=True)
+    price = models.DecimalField(
+        'Цена за единицу измерения, руб.', max_digits=12, decimal_places=4,
+        blank=True, null=True)
 
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['name', 'measurement_unit'],
+                         name='ingredient_name_unit_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -52,11 +75,25 @@ class Recipe(models.Model):
         Tag, related_name='recipes', verbose_name='Теги')
     cooking_time = models.IntegerField(
         'Время приготовления в минутах', validators=[MinValueValidator(1)])
+    total_calories = models.FloatField(
+        'Калорийность, ккал', blank=True, null=True, editable=False,
+        db_index=True)
+    total_proteins = models.FloatField(
+        'Белки, г', blank=True, null=True, editable=False)
+    total_cost = models.DecimalField(
+        'Стоимость, руб.', max_digits=14, decimal_places=2, blank=True,
+        null=True, editable=False, db_index=True)
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['-pub_date', 'id'],
+                         name='recipe_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='recipe_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -135,6 +172,8 @@ class ShoppingCart(models.Model):
         related_name='in_shopping_cart',
         verbose_name='Рецепт'
     )
+    servings = models.PositiveSmallIntegerField(
+        'Количество порций', default=1, validators=[MinValueValidator(1)])
 
     class Meta:
         verbose_name = 'Рецепт в списке покупок'
@@ -144,3 +183,161 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user.username}: {self.recipe.name}'
+
+
+class RecipeVector(models.Model):
+    recipe = models.OneToOneField(
+        Recipe, on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='vector',
+        verbose_name='Рецепт'
+    )
+    ingredients = models.BinaryField('id ингредиентов (int32)')
+    tags = models.BinaryField('id тегов (int32)')
+
+    class Meta:
+        verbose_name = 'Вектор рецепта'
+        verbose_name_plural = 'Векторы рецептов'
+
+    def __str__(self):
+        return str(self.recipe_id)
+
+
+class RecipeNeighbors(models.Model):
+    SIMILAR = 'similar'
+    ALSO_FAVORITED = 'also_favorited'
+    KINDS = (
+        (SIMILAR, 'Похожие рецепты'),
+        (ALSO_FAVORITED, 'С этим рецептом также добавляют в избранное'),
+    )
+
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='neighbors',
+        verbose_name='Рецепт'
+    )
+    kind = models.CharField('Тип', max_length=20, choices=KINDS)
+    neighbor_ids = models.BinaryField('id соседей (int32)')
+    scores = models.BinaryField('Оценки (float32)')
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Соседи рецепта'
+        verbose_name_plural = 'Соседи рецептов'
+        constraints = [models.UniqueConstraint(
+            fields=['recipe', 'kind'], name='unique_recipe_neighbors')]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.kind}'
+
+    def get_neighbor_ids(self):
+        return unpack_array(self.neighbor_ids, 'i')
+
+    def get_scores(self):
+        return unpack_array(self.scores, 'f')
+
+
+class RecommenderState(models.Model):
+    kind = models.CharField(
+        'Тип', max_length=20, unique=True, choices=RecipeNeighbors.KINDS)
+    last_favorite_id = models.PositiveIntegerField(
+        'Последнее учтённое избранное', default=0)
+    last_shopping_cart_id = models.PositiveIntegerField(
+        'Последний учтённый рецепт в списке покупок', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Состояние рекомендаций'
+        verbose_name_plural = 'Состояния рекомендаций'
+
+    def __str__(self):
+        return self.kind
+
+
+class ChangeLog(models.Model):
+    RECIPE = 'recipe'
+    TAG = 'tag'
+    FAVORITE = 'favorite'
+    SHOPPING_CART = 'shopping_cart'
+    KINDS = (
+        (RECIPE, 'Рецепт'),
+        (TAG, 'Тег'),
+        (FAVORITE, 'Избранное'),
+        (SHOPPING_CART, 'Список покупок'),
+    )
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTIONS = (
+        (UPSERT, 'Создан или изменён'),
+        (DELETE, 'Удалён'),
+    )
+
+    kind = models.CharField('Тип', max_length=20, choices=KINDS)
+    object_id = models.PositiveIntegerField('id объекта')
+    action = models.CharField('Действие', max_length=10, choices=ACTIONS)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, blank=True, null=True,
+        related_name='+',
+        verbose_name='Пользователь',
+        help_text='Для избранного и списка покупок: чьё это изменение.'
+    )
+    created = models.DateTimeField('Создано', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Запись журнала изменений'
+        verbose_name_plural = 'Журнал изменений'
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=['kind', 'object_id'],
+                         name='changelog_kind_object_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}: {self.action}'
+
+
+class TagFacet(models.Model):
+    tag = models.OneToOneField(
+        Tag, on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='facet',
+        verbose_name='Тег'
+    )
+    recipes_count = models.PositiveIntegerField('Число рецептов', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик рецептов тега'
+        verbose_name_plural = 'Счётчики рецептов тегов'
+
+    def __str__(self):
+        return f'{self.tag_id}: {self.recipes_count}'
+
+
+class ThrottleBucket(models.Model):
+    """Корзина токенов ``TokenBucketThrottle`` для одного клиента."""
+    key = models.CharField('Ключ', max_length=200, unique=True)
+    scope = models.CharField('Область', max_length=50)
+    tokens = models.FloatField('Токены')
+    updated = models.FloatField('Обновлено (unix-время)')
+
+    class Meta:
+        verbose_name = 'Корзина токенов'
+        verbose_name_plural = 'Корзины токенов'
+        indexes = [models.Index(fields=['scope', 'updated'],
+                                name='throttle_scope_updated_idx')]
+
+    def __str__(self):
+        return f'{self.key}: {self.tokens:.1f}'
+
+
+class ThrottleCounter(models.Model):
+    scope = models.CharField('Область', max_length=50, unique=True)
+    allowed = models.BigIntegerField('Пропущено', default=0)
+    throttled = models.BigIntegerField('Отклонено', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик ограничений'
+        verbose_name_plural = 'Счётчики ограничений'
+
+    def __str__(self):
+        return self.scope
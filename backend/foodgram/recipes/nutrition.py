@@ -0,0 +1,98 @@
+"""Калорийность, белки и стоимость рецептов.
+
+У ингредиента значения заданы на одну его единицу измерения
+(«мука, г» — на грамм, «молоко, стакан» — на стакан), поэтому итог
+рецепта — сумма ``amount * значение`` без перевода единиц. Если хотя
+бы у одного ингредиента значения нет, итог неизвестен (NULL): такой
+рецепт не попадёт под фильтр ``?max_calories=``, а не покажется
+обманчиво лёгким.
+
+Итоги хранятся в полях ``Recipe`` с индексами и пересчитываются
+только для рецептов, у которых изменились ``Amount``: изменения
+в одной транзакции собираются и пересчитываются одним запросом после
+её фиксации.
+"""
+from collections import defaultdict
+
+from asgiref.local import Local
+from django.db import transaction
+
+from .models import Amount, Recipe
+
+# Поле рецепта -> поле ингредиента.
+TOTAL_FIELDS = {
+    'total_calories': 'calories',
+    'total_proteins': 'proteins',
+    'total_cost': 'price',
+}
+BATCH_SIZE = 1000
+
+_state = Local()
+
+
+def compute_totals(recipe_ids):
+    totals = {recipe_id: dict.fromkeys(TOTAL_FIELDS) for recipe_id in
+              recipe_ids}
+    known = defaultdict(lambda: dict.fromkeys(TOTAL_FIELDS, True))
+    # Стоимость суммируется в Decimal, как цены, остальное — во float.
+    sums = defaultdict(lambda: dict.fromkeys(TOTAL_FIELDS, 0))
+    rows = Amount.objects.filter(recipe_id__in=recipe_ids).values_list(
+        'recipe_id', 'amount',
+        *[f'ingredient__{name}' for name in TOTAL_FIELDS.values()])
+    for recipe_id, amount, *values in rows:
+        for field, value in zip(TOTAL_FIELDS, values):
+            if value is None:
+                known[recipe_id][field] = False
+            else:
+                sums[recipe_id][field] += amount * value
+    for recipe_id, recipe_sums in sums.items():
+        for field, value in recipe_sums.items():
+            if known[recipe_id][field]:
+                totals[recipe_id][field] = round(value, 2)
+    return totals
+
+
+def update_recipe_totals(recipe_ids):
+    recipe_ids = sorted(recipe_ids)
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        totals = compute_totals(recipe_ids[start:start + BATCH_SIZE])
+        Recipe.objects.bulk_update(
+            [Recipe(id=recipe_id, **values)
+             for recipe_id, values in totals.items()],
+            list(TOTAL_FIELDS))
+
+
+def update_ingredient_totals(ingredient_ids):
+    update_recipe_totals(set(Amount.objects.filter(
+        ingredient_id__in=ingredient_ids).values_list('recipe_id', flat=True)))
+
+
+def get_pending():
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        pending = _state.pending = defaultdict(set)
+    return pending
+
+
+def flush_recipe_totals(using):
+    recipe_ids = get_pending().pop(using, None)
+    if recipe_ids:
+        update_recipe_totals(recipe_ids)
+
+
+def schedule_recipe_totals(recipe_id, using=None):
+    """Пересчитывает итоги рецепта после фиксации текущей транзакции.
+
+    Все рецепты, затронутые в одной транзакции, пересчитываются вместе
+    первым сработавшим колбэком, остальные ничего не делают. Колбэк
+    ставится на каждый вызов: после отката колбэки транзакции удаляются,
+    и набор рецептов забирает следующая зафиксированная транзакция
+    (лишний пересчёт безвреден). Вне транзакции пересчёт выполняется сразу.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        update_recipe_totals([recipe_id])
+        return
+    alias = connection.alias
+    get_pending()[alias].add(recipe_id)
+    transaction.on_commit(lambda: flush_recipe_totals(alias), using=alias)
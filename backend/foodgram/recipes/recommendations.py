@@ -0,0 +1,188 @@
+"""Рекомендации «с этим рецептом также добавляют в избранное».
+
+Из ``Favorite`` (и, по желанию, ``ShoppingCart`` с меньшим весом)
+строится разреженная матрица пользователи x рецепты. Совместная
+встречаемость рецептов нормируется как косинус между столбцами.
+Для каждого рецепта в ``RecipeNeighbors`` сохраняются лучшие
+``NEIGHBORS_COUNT`` рецептов.
+
+Инкрементальное обновление учитывает только новые записи (по id выше
+сохранённого в ``RecommenderState``) и читает не всю таблицу, а
+пользователей, у которых есть рецепты затронутых пользователей; нормы
+столбцов считаются агрегатом по всей таблице. Удаления из избранного
+учитываются при полной пересборке, её стоит запускать периодически.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from scipy import sparse
+
+from .models import Favorite, RecipeNeighbors, RecommenderState, ShoppingCart
+from .similarity import save_neighbors
+
+NEIGHBORS_COUNT = 12
+SHOPPING_CART_WEIGHT = 0.5
+BATCH_SIZE = 1024
+
+
+class CooccurrenceIndex:
+    def __init__(self, interactions, norms=None):
+        users, recipes, weights = interactions
+        self.user_ids, user_positions = np.unique(users, return_inverse=True)
+        self.recipe_ids, recipe_positions = np.unique(
+            recipes, return_inverse=True)
+        self.positions = {
+            int(recipe_id): position
+            for position, recipe_id in enumerate(self.recipe_ids)}
+        matrix = sparse.csr_matrix(
+            (weights, (user_positions, recipe_positions)),
+            shape=(len(self.user_ids), len(self.recipe_ids)))
+        # Повторы (рецепт и в избранном, и в покупках) дают максимум веса.
+        matrix.sum_duplicates()
+        self.matrix = matrix.minimum(1).tocsc()
+        if norms is None:
+            self.norms = np.sqrt(np.asarray(
+                self.matrix.multiply(self.matrix).sum(axis=0)).ravel())
+        else:
+            # Матрица неполная: нормы приходят снаружи, по всей таблице.
+            self.norms = np.array(
+                [norms.get(int(recipe_id), 0) for recipe_id in
+                 self.recipe_ids], dtype=np.float64)
+
+    def users_of(self, recipe_ids):
+        columns = [self.positions[recipe_id] for recipe_id in recipe_ids
+                   if recipe_id in self.positions]
+        return np.unique(self.matrix[:, columns].indices)
+
+    def recipes_of(self, user_positions):
+        rows = self.matrix.tocsr()[user_positions]
+        return {int(self.recipe_ids[column]) for column in rows.indices}
+
+    def top_n(self, recipe_ids, count):
+        result = {}
+        columns = [self.positions[recipe_id] for recipe_id in recipe_ids
+                   if recipe_id in self.positions]
+        for start in range(0, len(columns), BATCH_SIZE):
+            batch = columns[start:start + BATCH_SIZE]
+            cooccurrence = (self.matrix[:, batch].T @ self.matrix).tocsr()
+            for row, column in enumerate(batch):
+                begin, end = (cooccurrence.indptr[row],
+                              cooccurrence.indptr[row + 1])
+                neighbors = cooccurrence.indices[begin:end]
+                scores = cooccurrence.data[begin:end] / (
+                    self.norms[column] * self.norms[neighbors])
+                keep = neighbors != column
+                neighbors, scores = neighbors[keep], scores[keep]
+                order = np.argsort(-scores, kind='stable')[:count]
+                result[int(self.recipe_ids[column])] = (
+                    self.recipe_ids[neighbors[order]].tolist(),
+                    scores[order].tolist())
+        return result
+
+
+def get_sources(with_shopping_cart):
+    sources = [(Favorite, 1.0)]
+    if with_shopping_cart:
+        sources.append((ShoppingCart, SHOPPING_CART_WEIGHT))
+    return sources
+
+
+def load_interactions(with_shopping_cart, user_filter=Q()):
+    users, recipes, weights = [], [], []
+    for model, weight in get_sources(with_shopping_cart):
+        rows = np.array(
+            list(model.objects.filter(user_filter).values_list(
+                'user_id', 'recipe_id')),
+            dtype=np.int64).reshape(-1, 2)
+        users.append(rows[:, 0])
+        recipes.append(rows[:, 1])
+        weights.append(np.full(len(rows), weight, dtype=np.float32))
+    return (np.concatenate(users), np.concatenate(recipes),
+            np.concatenate(weights))
+
+
+def load_norms(recipes, with_shopping_cart):
+    """Нормы столбцов рецептов ``recipes`` по всей таблице.
+
+    Рецепт, который у пользователя и в избранном, и в покупках, весит 1,
+    поэтому покупки считаются только без избранного.
+    """
+    counts = [(Favorite.objects.all(), 1.0)]
+    if with_shopping_cart:
+        favorited = Favorite.objects.filter(
+            user=OuterRef('user'), recipe=OuterRef('recipe'))
+        counts.append((ShoppingCart.objects.filter(~Exists(favorited)),
+                       SHOPPING_CART_WEIGHT))
+    squares = {}
+    for queryset, weight in counts:
+        grouped = queryset.filter(recipes).order_by().values(
+            'recipe_id').annotate(count=Count('id'))
+        for recipe_id, count in grouped.values_list('recipe_id', 'count'):
+            squares[recipe_id] = squares.get(recipe_id, 0) + (
+                count * weight ** 2)
+    return {recipe_id: np.sqrt(square)
+            for recipe_id, square in squares.items()}
+
+
+def any_of(sources, field, lookups):
+    """Условие «``field`` встречается в строках любого источника»."""
+    condition = Q()
+    for model, _ in sources:
+        condition |= Q(**{f'{field}__in': model.objects.filter(
+            lookups).values(field)})
+    return condition
+
+
+def rebuild_recommendations(full=False, with_shopping_cart=False,
+                            count=NEIGHBORS_COUNT):
+    """Пересобирает рекомендации целиком или только для затронутых рецептов.
+
+    Новая запись (пользователь, рецепт) меняет встречаемость этого рецепта
+    со всеми рецептами пользователя, поэтому пересчитываются все рецепты
+    пользователей с новыми записями. Норма рецепта тоже меняется, и
+    оценки с ним у рецептов других пользователей уточнятся при полной
+    пересборке.
+    """
+    kind = RecipeNeighbors.ALSO_FAVORITED
+    state, _ = RecommenderState.objects.get_or_create(kind=kind)
+    last_favorite_id = Favorite.objects.order_by('-id').values_list(
+        'id', flat=True).first() or 0
+    last_shopping_cart_id = ShoppingCart.objects.order_by('-id').values_list(
+        'id', flat=True).first() or 0
+
+    sources = get_sources(with_shopping_cart)
+    if full:
+        index = CooccurrenceIndex(load_interactions(with_shopping_cart))
+        recipe_ids = index.recipe_ids.tolist()
+    else:
+        new_rows = {
+            Favorite: Q(id__gt=state.last_favorite_id,
+                        id__lte=last_favorite_id),
+            ShoppingCart: Q(id__gt=state.last_shopping_cart_id,
+                            id__lte=last_shopping_cart_id),
+        }
+        touched = Q()
+        for model, _ in sources:
+            touched |= Q(user__in=model.objects.filter(
+                new_rows[model]).values('user'))
+        # Оценки рецептов затронутых пользователей считаются по всем их
+        # пользователям, поэтому загружаются строки этих пользователей.
+        recipes = any_of(sources, 'recipe', touched)
+        users = any_of(sources, 'user', recipes)
+        recipe_ids = sorted(set().union(*(
+            model.objects.filter(touched).values_list('recipe_id', flat=True)
+            for model, _ in sources)))
+        index = CooccurrenceIndex(
+            load_interactions(with_shopping_cart, users),
+            load_norms(any_of(sources, 'recipe', users), with_shopping_cart))
+
+    neighbors = index.top_n(recipe_ids, count)
+    with transaction.atomic():
+        if full:
+            RecipeNeighbors.objects.filter(kind=kind).exclude(
+                recipe_id__in=recipe_ids).delete()
+        save_neighbors(kind, neighbors)
+        state.last_favorite_id = last_favorite_id
+        state.last_shopping_cart_id = last_shopping_cart_id
+        state.save()
+    return {'recipes': len(index.recipe_ids), 'recomputed': len(neighbors)}
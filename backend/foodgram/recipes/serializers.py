@@ -1,11 +1,13 @@
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import F
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
 from users.serializers import CustomUserSerializer
+from .fields import Base64ImageField
 from .models import (Amount, Favorite, Ingredient, Recipe, ShoppingCart,
                      Subscribe, Tag)
+from .tasks import update_similarity
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -34,21 +36,86 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+RECIPE_FIELDS = ('id', 'tags', 'author', 'ingredients',
+                 'is_favorited', 'is_in_shopping_cart',
+                 'name', 'image', 'text', 'cooking_time')
+RECIPE_COMPACT_FIELDS = ('id', 'tags', 'author',
+                         'is_favorited', 'is_in_shopping_cart',
+                         'name', 'image', 'cooking_time')
+# Итоги по ингредиентам выводятся только по запросу в ?fields=.
+RECIPE_TOTAL_FIELDS = ('total_calories', 'total_proteins', 'total_cost')
+RECIPE_EXPANDABLE_FIELDS = ('tags', 'author', 'ingredients')
+RECIPE_COLLAPSIBLE_FIELDS = ('tags', 'author')
+# Предел PositiveSmallIntegerField в ShoppingCart.servings.
+SERVINGS_MAX_VALUE = 32767
+SERVINGS_ERROR = ('Количество порций должно быть целым числом '
+                  f'от 1 до {SERVINGS_MAX_VALUE}.')
+SERVINGS_ERRORS = {'invalid': SERVINGS_ERROR, 'min_value': SERVINGS_ERROR,
+                   'max_value': SERVINGS_ERROR}
+
+
+def parse_list_param(value):
+    if not value:
+        return set()
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def get_recipe_field_selection(query_params):
+    """Разбирает параметры ?fields=, ?expand= и ?compact= запроса.
+
+    Возвращает кортеж из выводимых полей и множества вложенных полей,
+    которые нужно отдать в виде id вместо полного объекта.
+    """
+    requested = parse_list_param(query_params.get('fields'))
+    expand = parse_list_param(query_params.get('expand'))
+    compact = query_params.get('compact', '').lower() in ('1', 'true')
+    if requested:
+        fields = tuple(name for name in RECIPE_FIELDS + RECIPE_TOTAL_FIELDS
+                       if name in requested)
+    elif compact:
+        fields = tuple(
+            name for name in RECIPE_FIELDS
+            if name in RECIPE_COMPACT_FIELDS
+            or (name in expand and name in RECIPE_EXPANDABLE_FIELDS))
+    else:
+        fields = RECIPE_FIELDS
+    collapsed = set()
+    if compact:
+        collapsed = {name for name in RECIPE_COLLAPSIBLE_FIELDS
+                     if name in fields and name not in expand}
+    return fields or RECIPE_FIELDS, collapsed
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     author = CustomUserSerializer()
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    # Стоимость в ответе остаётся числом, как до перевода поля в Decimal.
+    total_cost = serializers.DecimalField(
+        max_digits=14, decimal_places=2, coerce_to_string=False,
+        read_only=True)
 
     class Meta:
         model = Recipe
-        fields = ('id', 'tags', 'author', 'ingredients',
-                  'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time')
+        fields = RECIPE_FIELDS + RECIPE_TOTAL_FIELDS
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields') or RECIPE_FIELDS
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+        collapsed = self.context.get('collapsed', ())
+        if 'tags' in collapsed:
+            self.fields['tags'] = serializers.PrimaryKeyRelatedField(
+                many=True, read_only=True)
+        if 'author' in collapsed:
+            self.fields['author'] = serializers.PrimaryKeyRelatedField(
+                read_only=True)
 
     def get_ingredients(self, obj):
-        queryset = Amount.objects.filter(recipe=obj)
+        queryset = obj.amount_set.all()
         return IngredientAmountSerializer(instance=queryset, many=True).data
 
     def get_is_favorited(self, obj):
@@ -151,6 +218,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
                 recipe=recipe, ingredient=ingredient_id,
                 defaults={'amount': amount})
 
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context.get('request').user
         tags_data = validated_data.pop('tags')
@@ -158,8 +226,10 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         self.add_recipe_ingredients(ingredients_data, recipe)
         recipe.tags.set(tags_data)
+        update_similarity.delay(recipe.id)
         return recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
         recipe.name = validated_data.get('name', recipe.name)
         recipe.text = validated_data.get('text', recipe.text)
@@ -174,6 +244,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             tags_data = validated_data.pop('tags')
             recipe.tags.set(tags_data)
         recipe.save()
+        update_similarity.delay(recipe.id)
         return recipe
 
     def to_representation(self, instance):
@@ -265,12 +336,18 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(required=False, source='recipe.image')
     cooking_time = serializers.IntegerField(
         required=False, source='recipe.cooking_time')
+    servings = serializers.IntegerField(
+        required=False, min_value=1, max_value=SERVINGS_MAX_VALUE,
+        error_messages=SERVINGS_ERRORS)
 
     class Meta:
         model = ShoppingCart
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'cooking_time', 'servings')
 
     def validate(self, data):
+        if self.instance is not None:
+            # Изменение числа порций рецепта, который уже в списке.
+            return data
         user = self.context['request'].user
         recipe_id = self.context.get('view').kwargs.get('recipe_id')
 
@@ -278,4 +355,27 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
                 user=user.id, recipe=recipe_id).exists():
             raise serializers.ValidationError(
                 'Этот рецепт уже в списке покупок.')
+        # Добавление идёт GET-запросом, порции передаются в ?servings=.
+        servings = self.context['request'].query_params.get('servings', 1)
+        try:
+            data['servings'] = int(servings)
+        except (TypeError, ValueError):
+            data['servings'] = 0
+        if not 1 <= data['servings'] <= SERVINGS_MAX_VALUE:
+            raise serializers.ValidationError(SERVINGS_ERROR)
         return data
+
+
+class RecipeBatchSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=100)
+
+    def validate_recipes(self, data):
+        return list(dict.fromkeys(data))
+
+
+class ShoppingCartBatchSerializer(RecipeBatchSerializer):
+    servings = serializers.IntegerField(
+        default=1, min_value=1, max_value=SERVINGS_MAX_VALUE,
+        error_messages=SERVINGS_ERRORS)
@@ -0,0 +1,64 @@
+"""Сводный список покупок с приведением единиц измерения.
+
+Один и тот же продукт в рецептах может быть записан в разных единицах
+(«мука, г» и «мука, кг», «молоко, мл» и «молоко, стакан»). Количества
+переводятся в базовую единицу и суммируются одним запросом к БД,
+с учётом числа порций каждого рецепта в списке покупок.
+"""
+from django.db.models import (Case, CharField, F, FloatField, Sum, Value,
+                              When)
+
+from .models import Amount
+
+# Единица -> (базовая единица, сколько базовых единиц в одной).
+UNIT_CONVERSIONS = {
+    'г': ('г', 1),
+    'кг': ('г', 1000),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+    'стакан': ('мл', 200),
+    'ст. л.': ('мл', 15),
+    'ч. л.': ('мл', 5),
+    'капля': ('мл', 0.05),
+}
+
+# Базовая единица -> (крупная единица, с какого количества на неё переходить).
+DISPLAY_UNITS = {
+    'г': ('кг', 1000),
+    'мл': ('л', 1000),
+}
+
+
+def get_shopping_list(user):
+    """Возвращает список (название, единица, количество) по алфавиту."""
+    unit_field = 'ingredient__measurement_unit'
+    factor = Case(
+        *[When(**{unit_field: unit}, then=Value(ratio))
+          for unit, (base, ratio) in UNIT_CONVERSIONS.items()],
+        default=Value(1), output_field=FloatField())
+    base_unit = Case(
+        *[When(**{unit_field: unit}, then=Value(base))
+          for unit, (base, ratio) in UNIT_CONVERSIONS.items()],
+        default=F(unit_field), output_field=CharField())
+    rows = Amount.objects.filter(
+        recipe__in_shopping_cart__user=user
+    ).values(
+        name=F('ingredient__name'), unit=base_unit
+    ).annotate(
+        total=Sum(F('amount') * F('recipe__in_shopping_cart__servings')
+                  * factor, output_field=FloatField())
+    ).order_by('name', 'unit')
+    return [(row['name'], *to_display_unit(row['unit'], row['total']))
+            for row in rows]
+
+
+def to_display_unit(unit, total):
+    if unit in DISPLAY_UNITS:
+        display_unit, ratio = DISPLAY_UNITS[unit]
+        if total >= ratio:
+            return display_unit, total / ratio
+    return unit, total
+
+
+def format_amount(total):
+    return f'{round(total, 3):g}'
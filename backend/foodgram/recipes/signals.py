@@ -0,0 +1,128 @@
+from asgiref.local import Local
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .bundle import invalidate_author, invalidate_recipes
+from .changelog import USER_RECIPE_KINDS, log_change
+from .facets import change_tag_counts, count_tag_links
+from .models import (Amount, ChangeLog, Favorite, Ingredient, Recipe,
+                     ShoppingCart, Tag, TagFacet)
+from .nutrition import TOTAL_FIELDS, schedule_recipe_totals
+from .tasks import recompute_ingredient_totals
+
+User = get_user_model()
+
+
+# Рецепты, удаляемые в этом потоке: их ингредиенты удаляются каскадом
+# раньше самого рецепта, и записи об их изменении не нужны.
+_deleting = Local()
+
+
+def get_deleting_recipes():
+    recipe_ids = getattr(_deleting, 'recipe_ids', None)
+    if recipe_ids is None:
+        recipe_ids = _deleting.recipe_ids = set()
+    return recipe_ids
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, created=False, signal=None, **kwargs):
+    deleted = signal is post_delete
+    if deleted:
+        get_deleting_recipes().discard(instance.pk)
+    invalidate_recipes([instance.pk])
+    log_change(ChangeLog.RECIPE, instance.pk,
+               ChangeLog.DELETE if deleted else ChangeLog.UPSERT)
+    # Новый или удалённый рецепт меняет число рецептов автора.
+    if created or deleted:
+        invalidate_author(instance.author_id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    get_deleting_recipes().add(instance.pk)
+    # Связи с тегами удаляются каскадом, без m2m_changed.
+    counts = count_tag_links(recipe=instance)
+    change_tag_counts({tag_id: -count for tag_id, count in counts.items()})
+
+
+@receiver(post_save, sender=Amount)
+@receiver(post_delete, sender=Amount)
+def amount_changed(sender, instance, signal=None, **kwargs):
+    if (signal is post_delete
+            and instance.recipe_id in get_deleting_recipes()):
+        return
+    invalidate_recipes([instance.recipe_id])
+    schedule_recipe_totals(instance.recipe_id)
+    log_change(ChangeLog.RECIPE, instance.recipe_id, ChangeLog.UPSERT)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance, created=False, signal=None, **kwargs):
+    if created:
+        TagFacet.objects.create(tag=instance)
+    log_change(ChangeLog.TAG, instance.pk,
+               ChangeLog.DELETE if signal is post_delete
+               else ChangeLog.UPSERT)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def user_recipe_changed(sender, instance, signal=None, **kwargs):
+    log_change(USER_RECIPE_KINDS[sender], instance.recipe_id,
+               ChangeLog.DELETE if signal is post_delete
+               else ChangeLog.UPSERT,
+               user_id=instance.user_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, update_fields=None,
+                       **kwargs):
+    if created or (update_fields is not None
+                   and not set(update_fields) & set(TOTAL_FIELDS.values())):
+        return
+    recompute_ingredient_totals.delay(instance.pk)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_relations_changed(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        recipe_ids = [instance.pk]
+    else:
+        recipe_ids = pk_set or ()
+    invalidate_recipes(recipe_ids)
+    for recipe_id in recipe_ids:
+        log_change(ChangeLog.RECIPE, recipe_id, ChangeLog.UPSERT)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # В post_add pk_set содержит только новые связи, а в pre_remove —
+    # все переданные id, поэтому удаляемые связи считаем по таблице.
+    if action == 'post_add':
+        if reverse:
+            change_tag_counts({instance.pk: len(pk_set)})
+        else:
+            change_tag_counts({tag_id: 1 for tag_id in pk_set})
+    elif action in ('pre_remove', 'pre_clear'):
+        lookups = {'tag' if reverse else 'recipe': instance}
+        if action == 'pre_remove':
+            lookups['recipe_id__in' if reverse else 'tag_id__in'] = pk_set
+        counts = count_tag_links(**lookups)
+        change_tag_counts(
+            {tag_id: -count for tag_id, count in counts.items()})
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_author(instance.pk)
@@ -0,0 +1,247 @@
+"""Похожие рецепты по составу ингредиентов и тегам.
+
+Рецепт описывается множествами id ингредиентов и тегов. Эти множества
+хранятся в ``RecipeVector`` компактными массивами int32. Похожесть двух
+рецептов — взвешенная сумма коэффициентов Жаккара по ингредиентам и
+по тегам. Для каждого рецепта в ``RecipeNeighbors`` сохраняются
+``NEIGHBORS_COUNT`` ближайших соседей, поэтому эндпоинт только читает
+готовый список.
+
+Модуль тянет numpy и scipy и нужен только команде
+``rebuild_similarity`` и фоновым задачам, но не обработке запросов.
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from scipy import sparse
+
+from .bundle import invalidate_recipes
+from .models import Amount, Recipe, RecipeNeighbors, RecipeVector
+
+TAG_WEIGHT = 0.2
+NEIGHBORS_COUNT = 12
+BATCH_SIZE = 128
+WRITE_BATCH_SIZE = 1000
+
+
+def pack(values, dtype):
+    return np.asarray(values, dtype=dtype).tobytes()
+
+
+def load_recipe_sets():
+    recipe_ids = list(Recipe.objects.order_by('id').values_list(
+        'id', flat=True))
+    ingredients = defaultdict(list)
+    for recipe_id, ingredient_id in Amount.objects.order_by(
+            'recipe_id', 'ingredient_id').values_list(
+            'recipe_id', 'ingredient_id').iterator():
+        ingredients[recipe_id].append(ingredient_id)
+    tags = defaultdict(list)
+    for recipe_id, tag_id in Recipe.tags.through.objects.order_by(
+            'recipe_id', 'tag_id').values_list('recipe_id', 'tag_id'):
+        tags[recipe_id].append(tag_id)
+    return recipe_ids, ingredients, tags
+
+
+class SimilarityIndex:
+    def __init__(self, recipe_ids, ingredients, tags):
+        self.recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        self.positions = {
+            recipe_id: position
+            for position, recipe_id in enumerate(recipe_ids)}
+        self.ingredients = self.build_matrix(recipe_ids, ingredients)
+        self.tags = self.build_matrix(recipe_ids, tags)
+        self.ingredient_sizes = self.row_sizes(self.ingredients)
+        self.tag_sizes = self.row_sizes(self.tags)
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    @staticmethod
+    def build_matrix(recipe_ids, sets):
+        rows, columns = [], []
+        for position, recipe_id in enumerate(recipe_ids):
+            values = sets.get(recipe_id, ())
+            rows.extend([position] * len(values))
+            columns.extend(values)
+        _, columns = np.unique(
+            np.asarray(columns, dtype=np.int64), return_inverse=True)
+        width = int(columns.max()) + 1 if len(columns) else 1
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32),
+             (np.asarray(rows, dtype=np.int64), columns)),
+            shape=(len(recipe_ids), width))
+
+    @staticmethod
+    def row_sizes(matrix):
+        return np.asarray(matrix.sum(axis=1), dtype=np.float32).ravel()
+
+    @staticmethod
+    def jaccard(matrix, sizes, rows):
+        intersection = (matrix[rows] @ matrix.T).toarray()
+        union = sizes[rows, None] + sizes[None, :] - intersection
+        return np.divide(intersection, union,
+                         out=np.zeros_like(intersection), where=union > 0)
+
+    def scores(self, rows):
+        """Матрица похожести строк ``rows`` (позиций) со всеми рецептами."""
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = ((1 - TAG_WEIGHT)
+                  * self.jaccard(self.ingredients, self.ingredient_sizes, rows)
+                  + TAG_WEIGHT
+                  * self.jaccard(self.tags, self.tag_sizes, rows))
+        scores[np.arange(len(rows)), rows] = 0
+        return scores
+
+    def top_k(self, scores, count):
+        count = min(count, scores.shape[1] - 1)
+        if count <= 0:
+            return [([], []) for _ in range(scores.shape[0])]
+        columns = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        values = np.take_along_axis(scores, columns, axis=1)
+        order = np.argsort(-values, axis=1, kind='stable')
+        columns = np.take_along_axis(columns, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+        result = []
+        for row_columns, row_values in zip(columns, values):
+            keep = row_values > 0
+            result.append((self.recipe_ids[row_columns[keep]].tolist(),
+                           row_values[keep].tolist()))
+        return result
+
+
+def merge_neighbors(current, candidates, count):
+    merged = dict(zip(*current))
+    merged.update(candidates)
+    best = sorted(merged.items(), key=lambda item: -item[1])[:count]
+    return [recipe_id for recipe_id, _ in best], [score for _, score in best]
+
+
+def save_vectors(vectors, stored):
+    new = [RecipeVector(recipe_id=recipe_id, ingredients=ingredients,
+                        tags=tags)
+           for recipe_id, (ingredients, tags) in vectors.items()
+           if recipe_id not in stored]
+    changed = [RecipeVector(recipe_id=recipe_id, ingredients=ingredients,
+                            tags=tags)
+               for recipe_id, (ingredients, tags) in vectors.items()
+               if recipe_id in stored]
+    RecipeVector.objects.bulk_create(new, batch_size=WRITE_BATCH_SIZE)
+    RecipeVector.objects.bulk_update(
+        changed, ['ingredients', 'tags'], batch_size=WRITE_BATCH_SIZE)
+
+
+def save_neighbors(kind, neighbors):
+    now = timezone.now()
+    rows = [RecipeNeighbors(recipe_id=recipe_id, kind=kind,
+                            neighbor_ids=pack(ids, '<i4'),
+                            scores=pack(scores, '<f4'), updated=now)
+            for recipe_id, (ids, scores) in neighbors.items()]
+    known = {row.recipe_id: row.pk for row in
+             RecipeNeighbors.objects.filter(kind=kind).only('id', 'recipe')}
+    for row in rows:
+        row.pk = known.get(row.recipe_id)
+    RecipeNeighbors.objects.bulk_create(
+        [row for row in rows if row.pk is None],
+        batch_size=WRITE_BATCH_SIZE)
+    RecipeNeighbors.objects.bulk_update(
+        [row for row in rows if row.pk is not None],
+        ['neighbor_ids', 'scores', 'updated'], batch_size=WRITE_BATCH_SIZE)
+    invalidate_recipes(list(neighbors))
+
+
+def load_neighbors(kind):
+    neighbors = {}
+    for row in RecipeNeighbors.objects.filter(kind=kind).iterator():
+        neighbors[row.recipe_id] = (row.get_neighbor_ids(), row.get_scores())
+    return neighbors
+
+
+def rebuild_similarity(full=False, count=NEIGHBORS_COUNT, changed_ids=None):
+    """Обновляет векторы и списки похожих рецептов.
+
+    Без ``full`` пересчитываются только векторы изменившихся рецептов,
+    полные списки соседей — для них и для рецептов, у которых в списке
+    был изменившийся или удалённый рецепт. Остальным рецептам изменившиеся
+    рецепты подмешиваются в готовый список, если оказались ближе
+    последнего соседа. С ``changed_ids`` с сохранёнными векторами
+    сравниваются только эти рецепты, а не все.
+    """
+    recipe_ids, ingredients, tags = load_recipe_sets()
+    candidates = recipe_ids
+    stored_vectors = RecipeVector.objects.all()
+    if changed_ids is not None and not full:
+        changed_ids = set(changed_ids)
+        candidates = [recipe_id for recipe_id in recipe_ids
+                      if recipe_id in changed_ids]
+        stored_vectors = stored_vectors.filter(recipe_id__in=candidates)
+    stored = {
+        recipe_id: (bytes(stored_ingredients), bytes(stored_tags))
+        for recipe_id, stored_ingredients, stored_tags in
+        stored_vectors.values_list('recipe_id', 'ingredients', 'tags')
+    }
+    vectors = {}
+    for recipe_id in candidates:
+        vector = (pack(ingredients.get(recipe_id, ()), '<i4'),
+                  pack(tags.get(recipe_id, ()), '<i4'))
+        if full or stored.get(recipe_id) != vector:
+            vectors[recipe_id] = vector
+    existing = load_neighbors(RecipeNeighbors.SIMILAR)
+
+    changed = set(vectors)
+    if full:
+        recompute = set(recipe_ids)
+    else:
+        alive = set(recipe_ids)
+        recompute = changed | (alive - set(existing))
+        for recipe_id, (neighbor_ids, _) in existing.items():
+            if any(neighbor_id in changed or neighbor_id not in alive
+                   for neighbor_id in neighbor_ids):
+                recompute.add(recipe_id)
+
+    index = SimilarityIndex(recipe_ids, ingredients, tags)
+    result = {}
+    merged = {}
+    if recompute and len(index):
+        thresholds = np.zeros(len(index), dtype=np.float32)
+        for recipe_id, (_, scores) in existing.items():
+            position = index.positions.get(recipe_id)
+            if position is not None and len(scores) >= count:
+                thresholds[position] = scores[-1]
+        for position in (index.positions[recipe_id]
+                         for recipe_id in recompute):
+            thresholds[position] = np.inf
+
+        rows = sorted(index.positions[recipe_id] for recipe_id in recompute)
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            scores = index.scores(batch)
+            for position, neighbors in zip(batch, index.top_k(scores, count)):
+                result[int(index.recipe_ids[position])] = neighbors
+            sources = [row for row, position in enumerate(batch)
+                       if index.recipe_ids[position] in changed]
+            if not sources:
+                continue
+            source_scores = scores[sources]
+            for column in np.flatnonzero(
+                    (source_scores > thresholds[None, :]).any(axis=0)):
+                candidates = merged.setdefault(
+                    int(index.recipe_ids[column]), {})
+                for row in np.flatnonzero(source_scores[:, column] > 0):
+                    source_id = int(index.recipe_ids[batch[sources[row]]])
+                    candidates[source_id] = float(source_scores[row, column])
+        for recipe_id, candidates in merged.items():
+            result[recipe_id] = merge_neighbors(
+                existing.get(recipe_id, ([], [])), candidates, count)
+
+    with transaction.atomic():
+        save_vectors(vectors, stored)
+        save_neighbors(RecipeNeighbors.SIMILAR, result)
+    return {
+        'recipes': len(recipe_ids),
+        'vectors': len(vectors),
+        'recomputed': len(recompute),
+        'merged': len(merged),
+    }
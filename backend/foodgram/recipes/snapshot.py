@@ -0,0 +1,339 @@
+"""Снимок данных: выгрузка и загрузка рецептов, справочников и пользователей.
+
+Снимок — каталог с ``manifest.json``, файлом ``<модель>.ndjson.gz`` на
+каждую модель (одна строка JSON на объект, ключи — ``attname`` полей)
+и каталогом ``images`` с картинками. Картинка хранится один раз
+под именем из sha256 содержимого, в строке рецепта записано это имя.
+
+Выгрузка и загрузка идут потоком, пачками по ``batch_size`` строк,
+поэтому память не растёт с размером базы.
+
+При загрузке в непустую базу:
+
+- пользователи, теги, ингредиенты и рецепты сопоставляются
+  с существующими по естественному ключу (email или username, slug
+  или название, название с единицей измерения, автор с названием),
+  совпавшие не создаются, поэтому повторная загрузка того же снимка
+  ничего не дублирует;
+- новые объекты, на которые ссылаются другие модели, получают id
+  из свободного блока после текущего максимума. Внешние ключи
+  переназначаются по таблице соответствия, после загрузки
+  сбрасываются последовательности;
+- всё выполняется в одной транзакции, проверка внешних ключей
+  откладывается до её конца. Ссылка на объект, которого нет
+  в снимке, прерывает загрузку с ``ValueError``.
+
+Производные таблицы (векторы, соседи, рекомендации) не выгружаются,
+после загрузки их пересчитывают фоновые задачи. Счётчики рецептов
+по тегам пересчитываются в той же транзакции.
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models import Max
+
+from .facets import rebuild_tag_facets
+from .models import (Amount, Favorite, Ingredient, Recipe, ShoppingCart,
+                     Subscribe, Tag)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+User = get_user_model()
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+IMAGES_DIR = 'images'
+
+# Модель и её естественные ключи в порядке загрузки: сначала те,
+# на кого ссылаются.
+SNAPSHOT_MODELS = (
+    (User, (('email',), ('username',))),
+    (Tag, (('slug',), ('name',))),
+    (Ingredient, (('name', 'measurement_unit'),)),
+    (Recipe, (('author_id', 'name'),)),
+    (Recipe.tags.through, ()),
+    (Amount, ()),
+    (Subscribe, ()),
+    (Favorite, ()),
+    (ShoppingCart, ()),
+)
+
+
+def get_label(model):
+    return model._meta.label_lower
+
+
+def get_fields(model):
+    return list(model._meta.concrete_fields)
+
+
+def dumps(row):
+    if orjson is not None:
+        return orjson.dumps(row, default=DjangoJSONEncoder().default) + b'\n'
+    return (json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+            + '\n').encode()
+
+
+def loads(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ImageExporter:
+    def __init__(self, path):
+        self.path = os.path.join(path, IMAGES_DIR)
+        os.makedirs(self.path, exist_ok=True)
+        self.names = {}
+        self.missing = 0
+
+    def export(self, field, name):
+        if not name:
+            return name
+        if name not in self.names:
+            digest = hashlib.sha256()
+            try:
+                with field.storage.open(name, 'rb') as source:
+                    for chunk in iter(lambda: source.read(1 << 16), b''):
+                        digest.update(chunk)
+                    hashed = digest.hexdigest() + os.path.splitext(name)[1]
+                    target = os.path.join(self.path, hashed)
+                    if not os.path.exists(target):
+                        source.seek(0)
+                        with open(target, 'wb') as output:
+                            for chunk in iter(
+                                    lambda: source.read(1 << 16), b''):
+                                output.write(chunk)
+            except OSError:
+                self.missing += 1
+                hashed = ''
+            self.names[name] = hashed
+        return self.names[name]
+
+
+class ImageImporter:
+    def __init__(self, path):
+        self.path = os.path.join(path, IMAGES_DIR)
+        self.names = {}
+
+    def load(self, field, hashed):
+        if not hashed:
+            return hashed
+        if hashed not in self.names:
+            name = field.generate_filename(None, hashed)
+            if not field.storage.exists(name):
+                with open(os.path.join(self.path, hashed), 'rb') as source:
+                    name = field.storage.save(name, File(source))
+            self.names[hashed] = name
+        return self.names[hashed]
+
+
+def export_snapshot(path, batch_size=2000, report=None):
+    """Выгружает снимок в каталог ``path``.
+
+    ``report(label, rows, seconds)`` вызывается после каждой модели.
+    """
+    os.makedirs(path, exist_ok=True)
+    images = ImageExporter(path)
+    manifest = {'version': FORMAT_VERSION, 'models': []}
+    for model, _ in SNAPSHOT_MODELS:
+        started = time.perf_counter()
+        label = get_label(model)
+        fields = get_fields(model)
+        names = [field.attname for field in fields]
+        file_fields = [(index, field) for index, field in enumerate(fields)
+                       if isinstance(field, models.FileField)]
+        rows = 0
+        filename = f'{label}.ndjson.gz'
+        with gzip.open(os.path.join(path, filename), 'wb',
+                       compresslevel=6) as output:
+            for values in model.objects.order_by('pk').values_list(
+                    *names).iterator(chunk_size=batch_size):
+                values = list(values)
+                for index, field in file_fields:
+                    values[index] = images.export(field, values[index])
+                output.write(dumps(dict(zip(names, values))))
+                rows += 1
+        manifest['models'].append(
+            {'label': label, 'file': filename, 'rows': rows})
+        if report:
+            report(label, rows, time.perf_counter() - started)
+    manifest['missing_images'] = images.missing
+    with open(os.path.join(path, MANIFEST), 'w') as output:
+        json.dump(manifest, output, indent=2)
+    return manifest
+
+
+@contextmanager
+def keep_auto_now(model):
+    """Не даёт auto_now/auto_now_add перезаписать даты из снимка."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False)
+              or getattr(field, 'auto_now_add', False)]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class ModelLoader:
+    def __init__(self, model, natural_keys, id_maps, images, referenced):
+        self.model = model
+        self.natural_keys = natural_keys
+        self.id_maps = id_maps
+        self.images = images
+        self.fields = get_fields(model)
+        self.pk_name = model._meta.pk.attname
+        self.foreign_keys = [
+            (field.attname, field.related_model) for field in self.fields
+            if field.is_relation]
+        self.file_fields = [field for field in self.fields
+                            if isinstance(field, models.FileField)]
+        self.id_map = id_maps.setdefault(model, {}) if referenced else None
+        self.next_id = (model.objects.aggregate(
+            last=Max('pk'))['last'] or 0) + 1
+        self.known = {key: {} for key in natural_keys}
+        self.created = 0
+
+    def get_key(self, row, key):
+        return tuple(row[name] for name in key)
+
+    def find_existing(self, rows):
+        """Дополняет ``self.known`` объектами из БД с теми же ключами."""
+        for key in self.natural_keys:
+            values = {row[key[0]] for row in rows}
+            for existing in self.model.objects.filter(**{
+                    f'{key[0]}__in': values}).values('pk', *key):
+                self.known[key].setdefault(
+                    self.get_key(existing, key), existing['pk'])
+
+    def match(self, row):
+        for key in self.natural_keys:
+            pk = self.known[key].get(self.get_key(row, key))
+            if pk is not None:
+                return pk
+        return None
+
+    def remember(self, row, pk):
+        for key in self.natural_keys:
+            self.known[key].setdefault(self.get_key(row, key), pk)
+
+    def remap(self, row, old_pk):
+        for attname, related_model in self.foreign_keys:
+            if row[attname] is None or related_model not in self.id_maps:
+                continue
+            try:
+                row[attname] = self.id_maps[related_model][row[attname]]
+            except KeyError:
+                raise ValueError(
+                    f'{get_label(self.model)} {self.pk_name}={old_pk}: '
+                    f'{attname}={row[attname]} нет в снимке '
+                    f'{get_label(related_model)}') from None
+
+    def load_batch(self, rows):
+        old_pks = [row.pop(self.pk_name) for row in rows]
+        for row, old_pk in zip(rows, old_pks):
+            self.remap(row, old_pk)
+        # Ключи могут включать внешние ключи, поэтому ищем после замены id.
+        if self.natural_keys:
+            self.find_existing(rows)
+        objs = []
+        for row, old_pk in zip(rows, old_pks):
+            pk = self.match(row)
+            if pk is None:
+                if self.id_map is not None:
+                    pk = self.next_id
+                    self.next_id += 1
+                for field in self.file_fields:
+                    row[field.attname] = self.images.load(
+                        field, row[field.attname])
+                obj = self.model(**{
+                    field.attname: field.to_python(row[field.attname])
+                    for field in self.fields if field.attname in row})
+                obj.pk = pk
+                objs.append(obj)
+                self.remember(row, pk)
+            if self.id_map is not None:
+                self.id_map[old_pk] = pk
+        # Связи могут уже существовать, если их концы сопоставлены
+        # с существующими объектами.
+        self.model.objects.bulk_create(
+            objs, ignore_conflicts=self.id_map is None)
+        self.created += len(objs)
+
+
+def read_rows(path):
+    with gzip.open(path, 'rb') as source:
+        for line in source:
+            yield loads(line)
+
+
+def import_snapshot(path, batch_size=2000, report=None):
+    """Загружает снимок из каталога ``path`` в БД по умолчанию.
+
+    ``report(label, rows, created, seconds)`` вызывается после
+    каждой модели.
+    """
+    with open(os.path.join(path, MANIFEST)) as source:
+        manifest = json.load(source)
+    if manifest['version'] != FORMAT_VERSION:
+        raise ValueError(
+            f'Неподдерживаемая версия снимка: {manifest["version"]}')
+    files = {item['label']: item['file'] for item in manifest['models']}
+    referenced = {field.related_model
+                  for model, _ in SNAPSHOT_MODELS
+                  for field in get_fields(model) if field.is_relation}
+    images = ImageImporter(path)
+    id_maps = {}
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+        for model, natural_keys in SNAPSHOT_MODELS:
+            label = get_label(model)
+            if label not in files:
+                continue
+            started = time.perf_counter()
+            loader = ModelLoader(model, natural_keys, id_maps, images,
+                                 model in referenced)
+            rows = 0
+            with keep_auto_now(model):
+                for batch in batches(
+                        read_rows(os.path.join(path, files[label])),
+                        batch_size):
+                    loader.load_batch(batch)
+                    rows += len(batch)
+            if report:
+                report(label, rows, loader.created,
+                       time.perf_counter() - started)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [model for model, _ in SNAPSHOT_MODELS]):
+                cursor.execute(sql)
+        connection.check_constraints()
+        # Связи рецептов с тегами загружены без сигналов.
+        rebuild_tag_facets()
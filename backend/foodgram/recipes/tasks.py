@@ -0,0 +1,26 @@
+"""Фоновые задачи рецептов.
+
+numpy и scipy импортируются внутри задач, чтобы не замедлять запуск
+веб-процесса, который только ставит задачи в очередь.
+"""
+from tasks.queue import task
+
+from .nutrition import update_ingredient_totals
+
+
+@task
+def update_similarity(recipe_id=None):
+    from .similarity import rebuild_similarity
+    rebuild_similarity(
+        changed_ids=None if recipe_id is None else [recipe_id])
+
+
+@task
+def update_recommendations():
+    from .recommendations import rebuild_recommendations
+    rebuild_recommendations()
+
+
+@task
+def recompute_ingredient_totals(ingredient_id):
+    update_ingredient_totals([ingredient_id])
@@ -0,0 +1,47 @@
+from django.contrib import admin
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, Recipe
+
+CHANGELIST_URL = '/admin/recipes/recipe/'
+
+
+def get_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        assert client.get(url).status_code == 200
+    return len(context.captured_queries)
+
+
+def test_followers_counted_by_subquery(recipes, author, admin_user):
+    Favorite.objects.create(user=author, recipe=recipes[1])
+    Favorite.objects.create(user=author, recipe=recipes[2])
+    request = RequestFactory().get(CHANGELIST_URL)
+    request.user = admin_user
+    queryset = admin.site._registry[Recipe].get_queryset(request)
+
+    followers = dict(queryset.values_list('id', 'followers_count'))
+
+    assert followers == {recipe.id: count for recipe, count in zip(
+        recipes, (0, 2, 1, 0, 0, 0))}
+    assert 'GROUP BY' not in str(queryset.query).rsplit('FROM', 1)[1]
+
+
+def test_changelist_queries_do_not_grow(recipes, user, admin_client):
+    before = get_queries(admin_client, CHANGELIST_URL)
+    Recipe.objects.bulk_create([
+        Recipe(author=user, name=f'Ещё рецепт {index}', text='Текст',
+               cooking_time=5) for index in range(20)])
+    Favorite.objects.bulk_create([
+        Favorite(user=user, recipe=recipe) for recipe in recipes[2:]])
+
+    assert get_queries(admin_client, CHANGELIST_URL) == before
+
+
+def test_search_by_name_prefix(recipes, admin_client):
+    Recipe.objects.filter(id=recipes[1].id).update(name='Шарлотка')
+
+    response = admin_client.get(CHANGELIST_URL, {'q': 'Шарл'})
+
+    assert list(response.context['cl'].result_list) == [recipes[1]]
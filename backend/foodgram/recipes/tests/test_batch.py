@@ -0,0 +1,94 @@
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from recipes.models import Favorite, ShoppingCart
+from recipes.views import FavoriteViewSet, ShoppingCartViewSet
+
+MISSING_ID = 999999
+ROUTES = (
+    ('/api/recipes/favorite/batch/', Favorite, FavoriteViewSet),
+    ('/api/recipes/shopping_cart/batch/', ShoppingCart, ShoppingCartViewSet),
+)
+
+
+@pytest.fixture(params=ROUTES, ids=('favorite', 'shopping_cart'))
+def route(request):
+    return request.param
+
+
+def get_linked(model, user):
+    return set(model.objects.filter(user=user).values_list(
+        'recipe_id', flat=True))
+
+
+def test_batch_create(recipes, user, user_client, route):
+    url, model, _ = route
+    # У пользователя в обоих списках есть рецепт 1.
+    linked = get_linked(model, user)
+
+    response = user_client.post(url, {'recipes': [
+        recipes[1].id, recipes[3].id, MISSING_ID, recipes[3].id,
+    ]}, format='json')
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {'id': recipes[1].id, 'result': 'exists'},
+        {'id': recipes[3].id, 'result': 'added'},
+        {'id': MISSING_ID, 'result': 'not_found'},
+    ]
+    assert get_linked(model, user) == linked | {recipes[3].id}
+
+
+def test_batch_destroy(recipes, user, user_client, route):
+    url, model, _ = route
+    linked = get_linked(model, user)
+
+    response = user_client.delete(url, {'recipes': [
+        recipes[1].id, recipes[4].id, MISSING_ID, recipes[1].id,
+    ]}, format='json')
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {'id': recipes[1].id, 'result': 'removed'},
+        {'id': recipes[4].id, 'result': 'missing'},
+        {'id': MISSING_ID, 'result': 'not_found'},
+    ]
+    assert get_linked(model, user) == linked - {recipes[1].id}
+
+
+@pytest.mark.parametrize('recipe_ids', ([], list(range(1, 102)), ['x']),
+                         ids=('empty', 'too-many', 'not-int'))
+def test_batch_rejects_invalid_payload(recipes, user, user_client, route,
+                                       recipe_ids):
+    url, model, _ = route
+    linked = get_linked(model, user)
+
+    response = user_client.post(url, {'recipes': recipe_ids}, format='json')
+
+    assert response.status_code == 400
+    assert get_linked(model, user) == linked
+
+
+def test_batch_accepts_hundred_ids(recipes, user_client, route):
+    url, _, _ = route
+
+    response = user_client.post(
+        url, {'recipes': list(range(1, 101))}, format='json')
+
+    assert response.status_code == 200
+    assert len(response.json()) == 100
+
+
+def test_batch_ids_in_one_query(recipes, user, route,
+                                django_assert_num_queries):
+    url, _, viewset = route
+    view = viewset()
+    view.request = APIRequestFactory().post(url)
+    view.request.user = user
+    recipe_ids = [recipe.id for recipe in recipes] + [MISSING_ID]
+
+    with django_assert_num_queries(1):
+        existing, linked = view.get_batch_ids(recipe_ids)
+
+    assert existing == {recipe.id for recipe in recipes}
+    assert linked == get_linked(view.batch_model, user)
@@ -0,0 +1,50 @@
+"""Кэш страницы рецепта общий для процессов и сбрасывается после коммита."""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+
+from recipes.bundle import RECIPE_KEY
+from recipes.models import Recipe
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def get_cached_keys():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT cache_key FROM django_cache')
+        return {key.split(':', 2)[-1] for key, in cursor.fetchall()}
+
+
+def test_leading_zero_shares_cache_key(recipes, api_client):
+    recipe = recipes[0]
+    cache.clear()
+
+    first = api_client.get(f'/api/recipes/{recipe.id}/bundle/')
+    second = api_client.get(f'/api/recipes/0{recipe.id}/bundle/')
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    recipe_keys = {key for key in get_cached_keys()
+                   if key.startswith(RECIPE_KEY.format(''))}
+    assert recipe_keys == {RECIPE_KEY.format(recipe.id)}
+
+
+@pytest.mark.parametrize('lookup', ('x1', '١٢³', '5_0'))
+def test_non_numeric_id_is_not_found(recipes, api_client, lookup):
+    assert api_client.get(f'/api/recipes/{lookup}/bundle/').status_code == 404
+
+
+def test_change_clears_shared_cache(recipes, api_client):
+    recipe = recipes[0]
+    cache.clear()
+    api_client.get(f'/api/recipes/{recipe.id}/bundle/')
+    # Кэш лежит в базе, а не в памяти процесса.
+    assert RECIPE_KEY.format(recipe.id) in get_cached_keys()
+
+    Recipe.objects.filter(id=recipe.id).update(name='Новое имя')
+    recipe.refresh_from_db()
+    recipe.save()
+
+    assert RECIPE_KEY.format(recipe.id) not in get_cached_keys()
+    response = api_client.get(f'/api/recipes/{recipe.id}/bundle/')
+    assert response.json()['recipe']['name'] == 'Новое имя'
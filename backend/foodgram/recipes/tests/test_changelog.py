@@ -0,0 +1,51 @@
+from recipes.mixins import RecipeBatchMixin
+from recipes.models import ChangeLog, Favorite
+
+
+def get_entries(**lookups):
+    return list(ChangeLog.objects.filter(**lookups).order_by('id').values_list(
+        'kind', 'object_id', 'action'))
+
+
+def test_recipe_delete_logs_only_delete(recipes):
+    recipe_id = recipes[0].id
+    ChangeLog.objects.all().delete()
+
+    recipes[0].delete()
+
+    assert get_entries(kind=ChangeLog.RECIPE) == [
+        (ChangeLog.RECIPE, recipe_id, ChangeLog.DELETE)]
+
+
+def test_amount_delete_logs_upsert(recipes):
+    recipe = recipes[0]
+    ChangeLog.objects.all().delete()
+
+    recipe.amount_set.first().delete()
+
+    assert get_entries(kind=ChangeLog.RECIPE) == [
+        (ChangeLog.RECIPE, recipe.id, ChangeLog.UPSERT)]
+
+
+def test_batch_logs_only_inserted_rows(recipes, user, user_client,
+                                       monkeypatch):
+    raced, added = recipes[3], recipes[4]
+    get_batch_ids = RecipeBatchMixin.get_batch_ids
+
+    def race(self, recipe_ids):
+        existing, linked = get_batch_ids(self, recipe_ids)
+        # Параллельный запрос добавляет связь после выборки linked.
+        Favorite.objects.bulk_create([Favorite(user=user, recipe=raced)])
+        return existing, linked
+
+    monkeypatch.setattr(RecipeBatchMixin, 'get_batch_ids', race)
+    ChangeLog.objects.all().delete()
+
+    response = user_client.post(
+        '/api/recipes/favorite/batch/',
+        {'recipes': [raced.id, added.id]}, format='json')
+
+    assert response.json() == [{'id': raced.id, 'result': 'exists'},
+                               {'id': added.id, 'result': 'added'}]
+    assert get_entries(kind=ChangeLog.FAVORITE) == [
+        (ChangeLog.FAVORITE, added.id, ChangeLog.UPSERT)]
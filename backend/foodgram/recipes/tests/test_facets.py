@@ -0,0 +1,100 @@
+"""Счётчики TagFacet должны совпадать с таблицей связей рецептов и тегов."""
+from collections import Counter
+
+import pytest
+
+from recipes.facets import rebuild_tag_facets
+from recipes.models import Favorite, Recipe, ShoppingCart, Tag, TagFacet
+
+
+def get_counts():
+    return dict(TagFacet.objects.values_list('tag_id', 'recipes_count'))
+
+
+def get_expected():
+    links = Counter(Recipe.tags.through.objects.values_list(
+        'tag_id', flat=True))
+    return {tag_id: links[tag_id]
+            for tag_id in Tag.objects.values_list('id', flat=True)}
+
+
+@pytest.fixture
+def counted(recipes):
+    # Завтрак у всех шести рецептов, обед у четырёх, ужин у двух.
+    assert get_counts() == get_expected()
+    return recipes
+
+
+def test_forward_add_counts_only_new_links(counted, tags):
+    counted[0].tags.add(tags[0], tags[1], tags[2])
+
+    assert get_counts() == get_expected()
+
+
+def test_reverse_add(counted, tags):
+    tags[2].recipes.add(*counted)
+
+    assert get_counts()[tags[2].id] == 6
+    assert get_counts() == get_expected()
+
+
+def test_remove_ignores_missing_links(counted, tags):
+    counted[0].tags.remove(tags[1], tags[2])
+    tags[2].recipes.remove(counted[0], counted[1], counted[2])
+
+    assert get_counts() == get_expected()
+
+
+@pytest.mark.parametrize('change', (
+    lambda recipe, tags: recipe.tags.set([tags[2]]),
+    lambda recipe, tags: recipe.tags.clear(),
+    lambda recipe, tags: tags[0].recipes.clear(),
+), ids=('set', 'clear', 'reverse-clear'))
+def test_set_and_clear(counted, tags, change):
+    change(counted[2], tags)
+
+    assert get_counts() == get_expected()
+
+
+def test_recipe_delete(counted):
+    counted[2].delete()
+
+    assert get_counts() == get_expected()
+
+
+def test_author_cascade_delete(counted, author):
+    author.delete()
+
+    assert get_counts() == get_expected()
+    assert sum(get_counts().values()) == 6
+
+
+def test_new_tag_gets_facet(counted):
+    tag = Tag.objects.create(name='Перекус', color='#000000', slug='snack')
+
+    assert get_counts()[tag.id] == 0
+
+
+def test_rebuild_fixes_drift(counted, tags):
+    TagFacet.objects.update(recipes_count=99)
+    TagFacet.objects.filter(tag=tags[2]).delete()
+
+    assert rebuild_tag_facets() == 3
+    assert get_counts() == get_expected()
+
+
+def test_filtered_facets_ignore_tag_filter_for_tag_counts(
+        counted, tags, user, author, user_client):
+    Favorite.objects.create(user=user, recipe=counted[3])
+    ShoppingCart.objects.create(user=user, recipe=counted[5])
+
+    response = user_client.get('/api/recipes/', {
+        'facets': 1, 'tags': 'lunch', 'author': author.id})
+
+    facets = response.data['facets']
+    # У рецептов автора (1, 3, 5) теги считаются без фильтра по обеду.
+    assert {tag['slug']: tag['count'] for tag in facets['tags']} == {
+        'breakfast': 3, 'lunch': 2, 'dinner': 1}
+    # Избранное и список покупок — с фильтром: рецепт 3 без обеда.
+    assert facets['is_favorited'] == 1
+    assert facets['is_in_shopping_cart'] == 2
@@ -0,0 +1,83 @@
+"""Быстрые списки должны совпадать с выводом сериализаторов байт в байт."""
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from foodgram.renderers import FastJSONRenderer
+from recipes.serializers import (IngredientSerializer, RecipeSerializer,
+                                 TagSerializer)
+from recipes.views import IngredientsViewSet, RecipeViewSet, TagsViewSet
+
+RECIPE_QUERIES = (
+    '',
+    'compact=1',
+    'compact=true&expand=tags',
+    'compact=1&expand=author,ingredients',
+    'fields=id,name,text,ingredients',
+    'fields=id,tags,author,is_favorited,is_in_shopping_cart',
+    'fields=id,name,total_calories,total_proteins,total_cost',
+    'fields=image,cooking_time&compact=1',
+)
+
+
+@pytest.fixture(params=('anonymous', 'user'))
+def viewer(request, user):
+    return AnonymousUser() if request.param == 'anonymous' else user
+
+
+def get_view(viewset, path, viewer):
+    request = Request(APIRequestFactory().get(path))
+    request.user = viewer
+    return viewset(action='list', format_kwarg=None, request=request)
+
+
+def render_serializer(serializer_class, queryset, context):
+    return JSONRenderer().render(
+        serializer_class(queryset, many=True, context=context).data)
+
+
+def render_fast_path(view):
+    return FastJSONRenderer().render(
+        view.build_rows(view.get_values_queryset()))
+
+
+@pytest.mark.parametrize('query', RECIPE_QUERIES)
+def test_recipe_fast_path_matches_serializer(recipes, viewer, query):
+    view = get_view(RecipeViewSet, f'/api/recipes/?{query}', viewer)
+    expected = render_serializer(
+        RecipeSerializer, view.filter_queryset(view.get_queryset()),
+        view.get_serializer_context())
+
+    assert render_fast_path(view) == expected
+
+
+@pytest.mark.parametrize('query', RECIPE_QUERIES)
+def test_recipe_list_response_matches_serializer(
+        recipes, user, user_client, query):
+    view = get_view(RecipeViewSet, f'/api/recipes/?{query}', user)
+    expected = render_serializer(
+        RecipeSerializer, view.filter_queryset(view.get_queryset())[:6],
+        view.get_serializer_context())
+
+    response = user_client.get(f'/api/recipes/?{query}')
+
+    assert response.status_code == 200
+    results = response.content.split(b'"results":', 1)[1][:-1]
+    assert results == expected
+
+
+@pytest.mark.parametrize('viewset, serializer_class, query', (
+    (TagsViewSet, TagSerializer, ''),
+    (IngredientsViewSet, IngredientSerializer, ''),
+    (IngredientsViewSet, IngredientSerializer, 'search=мо'),
+))
+def test_values_list_matches_serializer(
+        tags, ingredients, viewer, viewset, serializer_class, query):
+    view = get_view(viewset, f'/api/items/?{query}', viewer)
+    expected = render_serializer(
+        serializer_class, view.filter_queryset(view.get_queryset()),
+        view.get_serializer_context())
+
+    assert render_fast_path(view) == expected
@@ -0,0 +1,64 @@
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from recipes.fields import Base64ImageField
+from recipes.models import Recipe
+
+# Картинка 1x1 в PNG.
+PNG = ('data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJ'
+       'AAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==')
+
+
+def test_base64_payload_is_saved(recipes, user_client):
+    recipe = recipes[0]
+
+    response = user_client.patch(
+        f'/api/recipes/{recipe.id}/', {'image': PNG}, format='json')
+
+    assert response.status_code == 200
+    image = Recipe.objects.get(id=recipe.id).image
+    assert image.name.endswith('.png')
+    with image.open('rb') as file:
+        assert file.read(8) == b'\x89PNG\r\n\x1a\n'
+
+
+@pytest.mark.parametrize('payload', (
+    'data:image/png;base64,не-base64',
+    'data:image/png;base64,' + 'QUJD' * 10,
+))
+def test_invalid_payload_is_validation_error(recipes, user_client, payload):
+    with pytest.raises(ValidationError):
+        Base64ImageField().to_internal_value(payload)
+
+    response = user_client.patch(
+        f'/api/recipes/{recipes[0].id}/', {'image': payload}, format='json')
+
+    assert response.status_code == 400
+    assert response.json()['image'] == [
+        str(Base64ImageField().error_messages['invalid_image'])]
+
+
+def test_decoder_is_built_once():
+    field = Base64ImageField(required=False)
+
+    assert field.decoder is field.decoder
+    assert field.decoder.required is False
+
+
+def test_serializers_do_not_import_image_modules():
+    code = (
+        'import sys, django; django.setup(); import recipes.serializers; '
+        'print(sorted({name.split(".")[0] for name in sys.modules} '
+        '& {"drf_extra_fields", "PIL"}))')
+
+    result = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True,
+        cwd=settings.BASE_DIR, check=True,
+        env={'DJANGO_SETTINGS_MODULE': 'foodgram.settings_test',
+             'PATH': ''})
+
+    assert result.stdout.strip() == '[]'
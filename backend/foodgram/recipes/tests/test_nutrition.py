@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+import pytest
+from django.db import transaction
+
+from recipes import nutrition
+from recipes.models import Recipe
+from recipes.nutrition import compute_totals, schedule_recipe_totals
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def updated(monkeypatch):
+    calls = []
+    update = nutrition.update_recipe_totals
+
+    def spy(recipe_ids):
+        calls.append(set(recipe_ids))
+        update(recipe_ids)
+
+    monkeypatch.setattr(nutrition, 'update_recipe_totals', spy)
+    return calls
+
+
+def test_cost_is_summed_in_decimal(recipes):
+    # 10 г муки по 0.06, 20 мл молока по 0.09, 30 яиц по 12.5.
+    totals = compute_totals([recipes[0].id])[recipes[0].id]
+
+    assert totals['total_cost'] == Decimal('377.40')
+    assert isinstance(totals['total_cost'], Decimal)
+    assert Recipe.objects.get(id=recipes[0].id).total_cost == Decimal(
+        '377.40')
+    # У соли нет цены, итог рецепта неизвестен.
+    assert compute_totals([recipes[1].id])[recipes[1].id]['total_cost'] is None
+
+
+def test_transaction_is_recomputed_once(recipes, updated):
+    with transaction.atomic():
+        for recipe in recipes[:3]:
+            schedule_recipe_totals(recipe.id)
+            schedule_recipe_totals(recipe.id)
+        assert updated == []
+
+    # В набор попадают и рецепты откаченных ранее транзакций.
+    assert len(updated) == 1
+    assert {recipe.id for recipe in recipes[:3]} <= updated[0]
+
+
+def test_recipe_rescheduled_after_rollback(recipes, updated):
+    recipe = recipes[0]
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            schedule_recipe_totals(recipe.id)
+            raise RuntimeError
+    Recipe.objects.filter(id=recipe.id).update(total_cost=None)
+
+    with transaction.atomic():
+        schedule_recipe_totals(recipe.id)
+
+    assert len(updated) == 1
+    assert recipe.id in updated[0]
+    assert Recipe.objects.get(id=recipe.id).total_cost == Decimal('377.40')
@@ -0,0 +1,58 @@
+"""Горячие запросы API должны идти по индексам.
+
+SQL берётся из настоящих запросов к API (представления, RecipeFilter,
+быстрые списки), каждый SELECT проверяется через EXPLAIN.
+"""
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+# Путь и нужен ли PostgreSQL: LIKE по UPPER(name) SQLite индексом
+# не ускоряет.
+HOT_REQUESTS = (
+    ('/api/recipes/?limit=6', False),
+    ('/api/recipes/?author={author}', False),
+    ('/api/recipes/?tags=breakfast&tags=lunch', False),
+    ('/api/recipes/?is_favorited=true', False),
+    ('/api/recipes/?is_in_shopping_cart=true&compact=1', False),
+    ('/api/recipes/?facets=1&tags=lunch', False),
+    ('/api/recipes/{recipe}/', False),
+    ('/api/recipes/{recipe}/bundle/', False),
+    ('/api/recipes/download_shopping_cart/', False),
+    ('/api/ingredients/?search=мук', True),
+)
+
+
+def explain(sql):
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # На маленькой таблице планировщик выберет Seq Scan и при
+            # наличии индекса; запрет показывает, есть ли подходящий индекс.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+        return [str(row[-1]) for row in cursor.fetchall()]
+
+
+def find_full_scans(plan):
+    if connection.vendor == 'postgresql':
+        return [line.strip() for line in plan if 'Seq Scan' in line]
+    return [line.strip() for line in plan
+            if line.startswith('SCAN') and 'INDEX' not in line
+            and line != 'SCAN subquery']
+
+
+@pytest.mark.parametrize('path, postgres_only', HOT_REQUESTS)
+def test_hot_queries_use_indexes(
+        recipes, author, user_client, path, postgres_only):
+    if postgres_only and connection.vendor != 'postgresql':
+        pytest.skip('нужен PostgreSQL')
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(
+            path.format(author=author.id, recipe=recipes[0].id))
+    assert response.status_code == 200
+
+    scans = {query['sql']: find_full_scans(explain(query['sql']))
+             for query in queries.captured_queries
+             if query['sql'].startswith('SELECT')}
+
+    assert {sql: lines for sql, lines in scans.items() if lines} == {}
@@ -0,0 +1,75 @@
+import pytest
+
+from recipes import recommendations
+from recipes.models import Favorite, RecipeNeighbors, ShoppingCart
+from recipes.recommendations import (CooccurrenceIndex, load_interactions,
+                                     rebuild_recommendations)
+from recipes.similarity import load_neighbors
+
+# (пользователь, рецепт) по индексам; пользователь 3 не пересекается
+# с теми, кто добавит новые записи.
+FAVORITES = ((0, 0), (0, 1), (1, 1), (1, 2), (2, 0), (2, 2), (2, 3),
+             (3, 5))
+CARTS = ((0, 2), (1, 2), (2, 1))
+
+
+@pytest.fixture
+def readers(django_user_model):
+    return [django_user_model.objects.create_user(
+        email=f'reader{index}@example.com', username=f'reader{index}',
+        first_name='Читатель', last_name=str(index), password='password')
+        for index in range(4)]
+
+
+@pytest.fixture
+def interactions(recipes, readers):
+    for model, pairs in ((Favorite, FAVORITES), (ShoppingCart, CARTS)):
+        for user, recipe in pairs:
+            model.objects.create(user=readers[user], recipe=recipes[recipe])
+
+
+@pytest.fixture
+def loaded_users(monkeypatch):
+    loaded = []
+
+    def spy(*args, **kwargs):
+        users, recipe_ids, weights = load_interactions(*args, **kwargs)
+        loaded.append(set(users.tolist()))
+        return users, recipe_ids, weights
+
+    monkeypatch.setattr(recommendations, 'load_interactions', spy)
+    return loaded
+
+
+@pytest.mark.parametrize('with_shopping_cart', (False, True))
+def test_incremental_update_matches_full_rebuild(
+        interactions, recipes, readers, loaded_users, with_shopping_cart):
+    rebuild_recommendations(full=True, with_shopping_cart=with_shopping_cart)
+    Favorite.objects.create(user=readers[1], recipe=recipes[3])
+    ShoppingCart.objects.create(user=readers[1], recipe=recipes[0])
+
+    stats = rebuild_recommendations(with_shopping_cart=with_shopping_cart)
+
+    # Пересчитываются все рецепты пользователя с новыми записями.
+    touched = {recipes[index].id for index in (1, 2, 3)}
+    if with_shopping_cart:
+        touched.add(recipes[0].id)
+    assert stats['recomputed'] == len(touched)
+    expected = CooccurrenceIndex(
+        load_interactions(with_shopping_cart)).top_n(touched, 12)
+    saved = load_neighbors(RecipeNeighbors.ALSO_FAVORITED)
+    for recipe_id, (neighbor_ids, scores) in expected.items():
+        assert saved[recipe_id][0] == neighbor_ids
+        assert saved[recipe_id][1] == pytest.approx(scores)
+    assert readers[3].id not in loaded_users[-1]
+    assert readers[3].id in loaded_users[0]
+
+
+def test_incremental_update_without_new_rows_loads_nothing(
+        interactions, loaded_users):
+    rebuild_recommendations(full=True)
+
+    stats = rebuild_recommendations()
+
+    assert stats['recomputed'] == 0
+    assert loaded_users[-1] == set()
@@ -0,0 +1,107 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Amount, Ingredient, Recipe, ShoppingCart
+from recipes.shopping import get_shopping_list
+
+DOWNLOAD_URL = '/api/recipes/download_shopping_cart/'
+
+
+@pytest.fixture
+def cart(recipes, user):
+    """Список покупок ``user`` из одного рецепта на две порции."""
+    ShoppingCart.objects.filter(user=user).delete()
+    recipe = Recipe.objects.create(
+        author=user, name='Блины', text='Текст', cooking_time=30)
+    for name, unit, amount in (
+            ('мука', 'г', 500), ('мука', 'кг', 1), ('молоко', 'стакан', 1),
+            ('молоко', 'ст. л.', 2), ('соль', 'щепотка', 3)):
+        ingredient, _ = Ingredient.objects.get_or_create(
+            name=name, measurement_unit=unit)
+        Amount.objects.create(recipe=recipe, ingredient=ingredient,
+                              amount=amount)
+    ShoppingCart.objects.create(user=user, recipe=recipe, servings=2)
+    return recipe
+
+
+def test_units_are_converted_and_promoted(cart, user):
+    assert get_shopping_list(user) == [
+        # (200 мл + 2 * 15 мл) * 2 порции, меньше литра.
+        ('молоко', 'мл', 460),
+        # (500 г + 1 кг) * 2 порции.
+        ('мука', 'кг', 3),
+        ('соль', 'щепотка', 6),
+    ]
+
+
+def test_shopping_list_is_one_query(cart, user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        get_shopping_list(user)
+
+
+def get_amount_queries(client):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(DOWNLOAD_URL)
+    assert response.status_code == 200
+    return response, [query['sql'] for query in context.captured_queries
+                      if 'recipes_amount' in query['sql']]
+
+
+def test_download_reads_amounts_once(cart, recipes, user, user_client):
+    response, queries = get_amount_queries(user_client)
+
+    assert len(queries) == 1
+    assert 'мука (кг): 3 \n' in response.content.decode()
+    assert 'молоко (мл): 460 \n' in response.content.decode()
+
+    ShoppingCart.objects.bulk_create([
+        ShoppingCart(user=user, recipe=recipe) for recipe in recipes])
+    _, queries = get_amount_queries(user_client)
+    assert len(queries) == 1
+
+
+def test_toggle_reads_servings_from_query(recipes, user, user_client):
+    recipe = recipes[3]
+
+    response = user_client.get(
+        f'/api/recipes/{recipe.id}/shopping_cart/', {'servings': 4})
+
+    assert response.status_code == 201
+    assert response.json()['servings'] == 4
+    assert user_client.get(
+        f'/api/recipes/{recipes[4].id}/shopping_cart/',
+        {'servings': 0}).status_code == 400
+
+
+def test_servings_can_be_changed(recipes, user, user_client):
+    url = f'/api/recipes/{recipes[1].id}/shopping_cart/'
+
+    response = user_client.patch(url, {'servings': 3}, format='json')
+
+    assert response.status_code == 200
+    assert response.json()['servings'] == 3
+    assert ShoppingCart.objects.get(
+        user=user, recipe=recipes[1]).servings == 3
+    assert user_client.patch(
+        url, {'servings': 0}, format='json').status_code == 400
+    assert user_client.patch(
+        f'/api/recipes/{recipes[3].id}/shopping_cart/', {'servings': 3},
+        format='json').status_code == 404
+
+
+def test_batch_stores_servings(recipes, user, user_client):
+    response = user_client.post(
+        '/api/recipes/shopping_cart/batch/',
+        {'recipes': [recipes[3].id, recipes[4].id], 'servings': 5},
+        format='json')
+
+    assert response.status_code == 200
+    assert dict(ShoppingCart.objects.filter(user=user).values_list(
+        'recipe_id', 'servings')) == {
+        recipes[1].id: 1, recipes[2].id: 1,
+        recipes[3].id: 5, recipes[4].id: 5}
+    assert user_client.post(
+        '/api/recipes/shopping_cart/batch/',
+        {'recipes': [recipes[5].id], 'servings': 0},
+        format='json').status_code == 400
@@ -0,0 +1,33 @@
+import pytest
+from django.db import transaction
+
+from recipes.models import Amount, RecipeVector
+from recipes.similarity import rebuild_similarity
+from recipes.tasks import update_similarity
+from tasks.models import Task
+from tasks.queue import run_pending
+
+
+def count_ingredients(recipe):
+    vector = RecipeVector.objects.get(recipe=recipe)
+    return len(bytes(vector.ingredients)) // 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_recipe_change_rebuilds_only_that_recipe(recipes, ingredients):
+    rebuild_similarity(full=True)
+    changed, untouched = recipes[0], recipes[1]
+    Amount.objects.create(recipe=changed, ingredient=ingredients[3],
+                          amount=1)
+    Amount.objects.create(recipe=untouched, ingredient=ingredients[0],
+                          amount=1)
+
+    with transaction.atomic():
+        update_similarity.delay(changed.id)
+    assert Task.objects.get().args == f'[{changed.id}]'
+    assert run_pending() == (1, 0)
+
+    assert count_ingredients(changed) == 4
+    assert count_ingredients(untouched) == 3
+    rebuild_similarity()
+    assert count_ingredients(untouched) == 4
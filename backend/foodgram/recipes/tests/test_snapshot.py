@@ -0,0 +1,60 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from recipes.models import Amount, Favorite, Recipe, ShoppingCart
+from recipes.snapshot import export_snapshot
+
+MODELS = (Recipe, Recipe.tags.through, Amount, Favorite, ShoppingCart)
+
+
+def count_rows():
+    return {model: model.objects.count() for model in MODELS}
+
+
+@pytest.fixture
+def snapshot(recipes, tmp_path):
+    path = tmp_path / 'snapshot'
+    export_snapshot(str(path))
+    return path
+
+
+def test_reimport_does_not_duplicate_recipes(snapshot):
+    before = count_rows()
+
+    call_command('import_snapshot', str(snapshot))
+    call_command('import_snapshot', str(snapshot))
+
+    assert count_rows() == before
+
+
+def test_reimport_adds_only_new_recipes(snapshot, recipes):
+    recipes[0].delete()
+    before = count_rows()
+
+    call_command('import_snapshot', str(snapshot))
+
+    restored = Recipe.objects.get(name=recipes[0].name)
+    assert restored.author == recipes[0].author
+    assert restored.amount_set.count() == 3
+    assert Recipe.objects.count() == before[Recipe] + 1
+
+
+def test_missing_reference_names_the_record(snapshot, recipes):
+    path = snapshot / 'recipes.amount.ndjson.gz'
+    with gzip.open(path) as source:
+        rows = [json.loads(line) for line in source]
+    rows[1]['ingredient_id'] = 10 ** 6
+    with gzip.open(path, 'wt') as output:
+        output.writelines(json.dumps(row) + '\n' for row in rows)
+    before = count_rows()
+
+    with pytest.raises(CommandError) as error:
+        call_command('import_snapshot', str(snapshot))
+
+    assert str(error.value) == (
+        f'recipes.amount id={rows[1]["id"]}: ingredient_id=1000000 '
+        f'нет в снимке recipes.ingredient')
+    assert count_rows() == before
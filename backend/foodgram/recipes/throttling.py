@@ -0,0 +1,39 @@
+from foodgram.throttling import TokenBucketThrottle
+
+IMAGE_COST_BYTES = 256 * 1024
+CART_COST_LINES = 50
+
+
+class RecipeWriteThrottle(TokenBucketThrottle):
+    """Создание и изменение рецепта: картинка в base64 — основная нагрузка."""
+    scope = 'recipe_write'
+
+    def get_cost(self, request, view):
+        try:
+            size = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            size = 0
+        return 1 + size // IMAGE_COST_BYTES
+
+
+class ShoppingCartDownloadThrottle(TokenBucketThrottle):
+    """Скачивание списка покупок. Вход стоит 1 токен, доплату за длину
+    списка представление списывает через ``charge`` по уже загруженным
+    строкам (см. ``get_list_cost``)."""
+    scope = 'shopping_cart_download'
+
+    @staticmethod
+    def get_list_cost(lines):
+        return len(lines) // CART_COST_LINES
+
+
+class IngredientSearchThrottle(TokenBucketThrottle):
+    """Поиск по ингредиентам; короткий запрос совпадает с большей частью
+    справочника и стоит дороже."""
+    scope = 'ingredient_search'
+
+    def get_cost(self, request, view):
+        term = request.query_params.get('search', '').strip()
+        if not term:
+            return 0
+        return 2 if len(term) < 3 else 1
@@ -23,8 +23,18 @@ urlpatterns = [
          name='favorite'),
     path('recipes/<int:recipe_id>/shopping_cart/',
          views.ShoppingCartViewSet.as_view(
-             {'get': 'create', 'delete': 'destroy'}),
+             {'get': 'create', 'patch': 'partial_update',
+              'delete': 'destroy'}),
          name='shopping_cart'),
+    path('recipes/favorite/batch/',
+         views.FavoriteViewSet.as_view(
+             {'post': 'batch_create', 'delete': 'batch_destroy'}),
+         name='favorite_batch'),
+    path('recipes/shopping_cart/batch/',
+         views.ShoppingCartViewSet.as_view(
+             {'post': 'batch_create', 'delete': 'batch_destroy'}),
+         name='shopping_cart_batch'),
+    path('changes/', views.changes, name='changes'),
     path('recipes/download_shopping_cart/',
          views.download_shopping_cart, name='download'),
     path('', include(router.urls)),
@@ -1,42 +1,59 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import filters, mixins, permissions, viewsets
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 
 from foodgram.pagination import FoodgramPagination
 
+from .bundle import get_recipe_bundle
+from .changelog import DEFAULT_LIMIT, MAX_LIMIT, get_changes
+from .facets import get_recipe_facets
+from .fastpath import (BATCHED_FIELDS, RECIPE_VALUES_FIELDS,
+                       get_recipe_values_fields, serialize_recipes)
 from .filters import RecipeFilter
-from .mixins import CustomViewSet
-from .models import (Amount, Favorite, Ingredient, Recipe, ShoppingCart,
-                     Subscribe, Tag)
+from .mixins import CustomViewSet, RecipeBatchMixin, ValuesListMixin
+from .models import (Amount, Favorite, Ingredient, Recipe, RecipeNeighbors,
+                     ShoppingCart, Subscribe, Tag)
 from .permissions import IsAuthor, SubscribePermission
 from .serializers import (CreateRecipeSerializer, FavoriteSerializer,
                           IngredientSerializer, RecipeSerializer,
+                          RecipeShortSerializer, ShoppingCartBatchSerializer,
                           ShoppingCartSerializer, SubscribeSerializer,
-                          TagSerializer)
+                          TagSerializer,
+                          get_recipe_field_selection)
+from .shopping import format_amount, get_shopping_list
+from .tasks import update_recommendations
+from .throttling import (IngredientSearchThrottle, RecipeWriteThrottle,
+                         ShoppingCartDownloadThrottle)
 
 User = get_user_model()
 
 
-class TagsViewSet(CustomViewSet):
+class TagsViewSet(ValuesListMixin, CustomViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    values_fields = ('id', 'name', 'color', 'slug')
     lookup_field = 'id'
 
 
-class IngredientsViewSet(CustomViewSet):
+class IngredientsViewSet(ValuesListMixin, CustomViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    values_fields = ('id', 'name', 'measurement_unit')
     lookup_field = 'id'
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
+    throttle_classes = [IngredientSearchThrottle]
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = [
@@ -55,6 +72,93 @@ class RecipeViewSet(viewsets.ModelViewSet):
         else:
             return CreateRecipeSerializer
 
+    def get_throttles(self):
+        if self.action in ['create', 'update', 'partial_update']:
+            return [RecipeWriteThrottle()]
+        return super().get_throttles()
+
+    def get_field_selection(self):
+        if not hasattr(self, '_field_selection'):
+            self._field_selection = get_recipe_field_selection(
+                self.request.query_params)
+        return self._field_selection
+
+    def get_queryset(self):
+        queryset = Recipe.objects.all()
+        if self.action not in ['list', 'retrieve']:
+            return queryset
+        fields, collapsed = self.get_field_selection()
+        queryset = queryset.only(
+            *[name for name in RECIPE_VALUES_FIELDS if name in fields])
+        if 'author' in fields and 'author' not in collapsed:
+            queryset = queryset.select_related('author')
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'amount_set',
+                queryset=Amount.objects.select_related(
+                    'ingredient').order_by('id')))
+        return queryset
+
+    def get_values_queryset(self):
+        fields, collapsed = self.get_field_selection()
+        return self.filter_queryset(Recipe.objects.all()).values(
+            *get_recipe_values_fields(fields))
+
+    def build_rows(self, rows):
+        fields, collapsed = self.get_field_selection()
+        return serialize_recipes(rows, self.request, fields, collapsed)
+
+    def list(self, request, *args, **kwargs):
+        fields, collapsed = self.get_field_selection()
+        if set(fields) & set(BATCHED_FIELDS):
+            response = super().list(request, *args, **kwargs)
+        else:
+            response = mixins.ListModelMixin.list(
+                self, request, *args, **kwargs)
+        if (request.query_params.get('facets') in ('1', 'true')
+                and isinstance(response.data, dict)):
+            response.data['facets'] = get_recipe_facets(request)
+        return response
+
+    def get_neighbors(self, kind):
+        recipe = self.get_object()
+        neighbors = RecipeNeighbors.objects.filter(
+            recipe=recipe, kind=kind).first()
+        if neighbors is None:
+            return Response([])
+        neighbor_ids = neighbors.get_neighbor_ids()
+        recipes = Recipe.objects.in_bulk(neighbor_ids)
+        serializer = RecipeShortSerializer(
+            [recipes[pk] for pk in neighbor_ids if pk in recipes],
+            many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, id=None):
+        return self.get_neighbors(RecipeNeighbors.SIMILAR)
+
+    @action(detail=True, methods=['get'])
+    def recommendations(self, request, id=None):
+        return self.get_neighbors(RecipeNeighbors.ALSO_FAVORITED)
+
+    @action(detail=True, methods=['get'])
+    def bundle(self, request, id=None):
+        # int() приводит "05" и "5" к одному ключу кэша.
+        bundle = (get_recipe_bundle(int(id), request)
+                  if id.isdecimal() else None)
+        if bundle is None:
+            raise Http404
+        return Response(bundle)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ['list', 'retrieve']:
+            context['fields'], context['collapsed'] = (
+                self.get_field_selection())
+        return context
+
 
 class SubscribeViewSet(viewsets.ModelViewSet):
     serializer_class = SubscribeSerializer
@@ -77,8 +181,9 @@ class SubscribeViewSet(viewsets.ModelViewSet):
         follow.delete()
 
 
-class FavoriteViewSet(viewsets.ModelViewSet):
+class FavoriteViewSet(RecipeBatchMixin, viewsets.ModelViewSet):
     serializer_class = FavoriteSerializer
+    batch_model = Favorite
     permission_classes = [IsAuthenticated, ]
     lookup_field = 'recipe_id'
 
@@ -89,6 +194,13 @@ class FavoriteViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         recipe = get_object_or_404(Recipe, pk=self.kwargs.get('recipe_id'))
         serializer.save(user=self.request.user, recipe=recipe)
+        update_recommendations.delay()
+
+    def perform_batch_create(self, objs):
+        inserted = super().perform_batch_create(objs)
+        if inserted:
+            update_recommendations.delay()
+        return inserted
 
     def perform_destroy(self, instance):
         user = self.request.user
@@ -97,8 +209,10 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         favorite.delete()
 
 
-class ShoppingCartViewSet(viewsets.ModelViewSet):
+class ShoppingCartViewSet(RecipeBatchMixin, viewsets.ModelViewSet):
     serializer_class = ShoppingCartSerializer
+    batch_model = ShoppingCart
+    batch_serializer_class = ShoppingCartBatchSerializer
     permission_classes = [IsAuthenticated, ]
     lookup_field = 'recipe_id'
 
@@ -110,6 +224,9 @@ class ShoppingCartViewSet(viewsets.ModelViewSet):
         recipe = get_object_or_404(Recipe, pk=self.kwargs.get('recipe_id'))
         serializer.save(user=self.request.user, recipe=recipe)
 
+    def get_batch_fields(self, data):
+        return {'servings': data['servings']}
+
     def perform_destroy(self, instance):
         user = self.request.user
         recipe = get_object_or_404(Recipe, pk=self.kwargs.get('recipe_id'))
@@ -117,28 +234,31 @@ class ShoppingCartViewSet(viewsets.ModelViewSet):
         favorite.delete()
 
 
+@api_view(['GET'])
+def changes(request):
+    since = request.query_params.get('since')
+    limit = request.query_params.get('limit', DEFAULT_LIMIT)
+    try:
+        since = int(since) if since is not None else None
+        limit = min(max(int(limit), 1), MAX_LIMIT)
+    except ValueError:
+        raise ValidationError('since и limit должны быть целыми числами.')
+    return Response(get_changes(request, since, limit))
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthor | IsAdminUser])
+@throttle_classes([ShoppingCartDownloadThrottle])
 def download_shopping_cart(request):
-    user = request.user
-    recipes_in_shopping_cart = Recipe.objects.filter(
-        in_shopping_cart__user=user)
-    ingredients_in_shopping_cart = Amount.objects.filter(
-        recipe__in=recipes_in_shopping_cart).select_related('ingredient')
-    ingredients_sum = ingredients_in_shopping_cart.values(
-        'ingredient').annotate(sum=Sum('amount'))
-
+    lines = get_shopping_list(request.user)
+    throttle = ShoppingCartDownloadThrottle()
+    throttle.charge(request, throttle.get_list_cost(lines))
     response = HttpResponse()
     response.write('Список покупок Foodgram \n')
     response.write('\n')
 
-    for item in ingredients_sum:
-        ingredient = ingredients_in_shopping_cart.filter(
-            ingredient=item['ingredient'])[0].ingredient
-        ingredient_name = ingredient.name
-        ingredient_unit = ingredient.measurement_unit
-        sum = item['sum']
-        response.write(f'{ingredient_name} ({ingredient_unit}): {sum} \n')
+    for name, unit, total in lines:
+        response.write(f'{name} ({unit}): {format_amount(total)} \n')
 
     response['Content-Type'] = 'text/plain'
     response['Content-Disposition'] = ('attachment; '
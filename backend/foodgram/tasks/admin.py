@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status',)
+    search_fields = ('name',)
+
+
+admin.site.register(Task, TaskAdmin)
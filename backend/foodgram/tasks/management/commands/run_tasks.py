@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.queue import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Пауза между опросами пустой очереди, с.')
+        parser.add_argument('--limit', type=int,
+                            help='Сколько задач выполнить за один опрос.')
+
+    def handle(self, *args, **options):
+        while True:
+            done, failed = run_pending(limit=options['limit'])
+            if done or failed:
+                self.stdout.write(
+                    f'Выполнено задач: {done}, с ошибкой: {failed}')
+            if options['once']:
+                break
+            if not done and not failed:
+                time.sleep(options['sleep'])
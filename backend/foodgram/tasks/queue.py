@@ -0,0 +1,133 @@
+"""Очередь фоновых задач в таблице ``Task``.
+
+Задача — функция, зарегистрированная декоратором ``@task``. Аргументы
+хранятся в JSON, поэтому передавать можно только простые значения
+(id, строки, числа). Задача ставится в очередь после фиксации текущей
+транзакции, чтобы воркер не увидел незакоммиченных данных и не получил
+задачу от откаченного запроса.
+
+Воркер — команда ``run_tasks``. Упавшая задача перезапускается
+с экспоненциальной задержкой, пока не исчерпает ``max_attempts``.
+Задача, зависшая в статусе «выполняется» дольше ``TASK_LOCK_TIMEOUT``
+(воркер упал), снова становится ожидающей.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """Регистрирует функцию как задачу и добавляет ей метод ``delay``."""
+    if func is None:
+        return partial(task, name=name, max_attempts=max_attempts)
+    func.task_name = name or f'{func.__module__}.{func.__name__}'
+    func.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+    func.delay = partial(enqueue, func.task_name)
+    registry[func.task_name] = func
+    return func
+
+
+def enqueue(name, *args, countdown=0, unique=True):
+    """Ставит задачу в очередь после фиксации текущей транзакции.
+
+    С ``unique`` задача не дублируется, если такая же (с теми же
+    аргументами) уже ждёт запуска: для идемпотентных пересчётов
+    одного прогона достаточно.
+    """
+    func = registry[name]
+    payload = json.dumps(args)
+
+    def create():
+        if unique and Task.objects.filter(
+                name=name, args=payload, status=Task.PENDING).exists():
+            return
+        Task.objects.create(
+            name=name, args=payload, max_attempts=func.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=countdown))
+
+    transaction.on_commit(create)
+
+
+def release_stale():
+    deadline = timezone.now() - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=deadline)
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, locked_at=None,
+        last_error='Воркер не завершил задачу.')
+    stale.update(status=Task.PENDING, locked_at=None)
+
+
+def claim():
+    """Забирает ближайшую готовую к запуску задачу или возвращает None."""
+    now = timezone.now()
+    while True:
+        with transaction.atomic():
+            queryset = Task.objects.filter(
+                status=Task.PENDING, run_at__lte=now
+            ).order_by('run_at', 'id')
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            task_id = queryset.values_list('id', flat=True).first()
+            if task_id is None:
+                return None
+            # Условное обновление защищает от гонки там, где нет
+            # SELECT ... FOR UPDATE SKIP LOCKED (SQLite).
+            claimed = Task.objects.filter(
+                id=task_id, status=Task.PENDING
+            ).update(status=Task.RUNNING, locked_at=now,
+                     attempts=F('attempts') + 1)
+        if claimed:
+            return Task.objects.get(id=task_id)
+
+
+def execute(task):
+    try:
+        func = registry[task.name]
+        func(*json.loads(task.args))
+    except Exception:
+        task.last_error = traceback.format_exc()
+        if task.attempts < task.max_attempts:
+            task.status = Task.PENDING
+            task.run_at = timezone.now() + timedelta(
+                seconds=settings.TASK_RETRY_DELAY * 2 ** (task.attempts - 1))
+        else:
+            task.status = Task.FAILED
+        logger.exception('Задача %s (%s) упала', task.name, task.pk)
+    else:
+        task.status = Task.DONE
+        task.last_error = ''
+    task.locked_at = None
+    task.save(update_fields=['status', 'run_at', 'locked_at', 'last_error'])
+    return task.status == Task.DONE
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи в текущем процессе.
+
+    Возвращает пару (выполнено, упало).
+    """
+    done = failed = 0
+    release_stale()
+    while limit is None or done + failed < limit:
+        close_old_connections()
+        task = claim()
+        if task is None:
+            break
+        if execute(task):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+import pytest
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.queue import release_stale, run_pending, task
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.fail', max_attempts=3)
+def fail():
+    raise ValueError('Сбой')
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def make_due(task_id):
+    Task.objects.filter(id=task_id).update(run_at=timezone.now())
+
+
+def test_task_is_queued_after_commit_and_runs():
+    with transaction.atomic():
+        record.delay(7)
+        assert not Task.objects.exists()
+
+    assert run_pending() == (1, 0)
+    assert calls == [7]
+    queued = Task.objects.get()
+    assert queued.status == Task.DONE
+    assert queued.attempts == 1
+    assert queued.locked_at is None
+
+
+def test_rolled_back_transaction_queues_nothing():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            record.delay(7)
+            raise RuntimeError
+
+    assert not Task.objects.exists()
+
+
+def test_failed_task_is_retried_with_backoff(settings):
+    settings.TASK_RETRY_DELAY = 30
+    fail.delay()
+    queued = Task.objects.get()
+
+    for attempt, delay in ((1, 30), (2, 60)):
+        started = timezone.now()
+        assert run_pending() == (0, 1)
+        queued.refresh_from_db()
+        assert queued.status == Task.PENDING
+        assert queued.attempts == attempt
+        assert 'ValueError' in queued.last_error
+        assert (started + timedelta(seconds=delay) <= queued.run_at
+                <= timezone.now() + timedelta(seconds=delay))
+        assert run_pending() == (0, 0)
+        make_due(queued.id)
+
+    assert run_pending() == (0, 1)
+    queued.refresh_from_db()
+    assert queued.status == Task.FAILED
+    assert queued.attempts == 3
+
+
+def test_stale_running_task_is_released(settings):
+    settings.TASK_LOCK_TIMEOUT = 60
+    old = timezone.now() - timedelta(seconds=120)
+    stale = Task.objects.create(
+        name='tests.record', args='[1]', status=Task.RUNNING, attempts=1,
+        locked_at=old)
+    exhausted = Task.objects.create(
+        name='tests.record', args='[2]', status=Task.RUNNING, attempts=3,
+        max_attempts=3, locked_at=old)
+    fresh = Task.objects.create(
+        name='tests.record', args='[3]', status=Task.RUNNING, attempts=1,
+        locked_at=timezone.now())
+
+    release_stale()
+
+    statuses = dict(Task.objects.values_list('id', 'status'))
+    assert statuses == {stale.id: Task.PENDING, exhausted.id: Task.FAILED,
+                        fresh.id: Task.RUNNING}
+    assert run_pending() == (1, 0)
+    assert calls == [1]
+
+
+def test_pending_duplicates_are_merged():
+    record.delay(1)
+    record.delay(1)
+    record.delay(2)
+
+    assert list(Task.objects.values_list('args', flat=True)) == ['[1]', '[2]']
+
+    record.delay(1, unique=False)
+    assert Task.objects.filter(args='[1]').count() == 2
+
+    run_pending()
+    record.delay(1)
+    assert Task.objects.filter(
+        args='[1]', status=Task.PENDING).count() == 1
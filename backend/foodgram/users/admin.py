@@ -1,12 +1,16 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
+from foodgram.pagination import EstimatedCountPaginator
+
 User = get_user_model()
 
 
 class UserAdmin(admin.ModelAdmin):
     list_display = ('username', 'first_name', 'last_name', 'email')
-    list_filter = ('username', 'email')
+    search_fields = ('^username', '^email')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(User, UserAdmin)
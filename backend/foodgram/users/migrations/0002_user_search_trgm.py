@@ -0,0 +1,36 @@
+# Generated by Django 3.0.5 on 2026-10-19 21:05
+
+from django.db import migrations
+
+INDEXES = (('user_username_trgm_idx', 'username'),
+           ('user_email_trgm_idx', 'email'))
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Поиск в админке идёт по UPPER(col) LIKE 'x%' (istartswith), его
+    # не ускоряют уникальные btree-индексы username и email.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} '
+            f'ON users_user USING gin (UPPER({column}) gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
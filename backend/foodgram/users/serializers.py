@@ -20,8 +20,19 @@ class CustomUserSerializer(UserSerializer):
         request_user = self.context['request'].user
         if isinstance(request_user, AnonymousUser):
             return False
+        if obj.pk == request_user.pk:
+            return False
+        # Списки пользователей аннотируют подписку одним запросом.
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
 
         get_user = obj.id
         is_subscribed = Subscribe.objects.filter(
             user_id=request_user, author_id=get_user).exists()
         return is_subscribed
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if hasattr(instance, 'recipes_count'):
+            data['recipes_count'] = instance.recipes_count
+        return data
@@ -0,0 +1,28 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+CHANGELIST_URL = '/admin/users/user/'
+
+
+def get_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        assert client.get(url).status_code == 200
+    return len(context.captured_queries)
+
+
+def test_changelist_queries_do_not_grow(
+        django_user_model, admin_client):
+    before = get_queries(admin_client, CHANGELIST_URL)
+    for index in range(20):
+        django_user_model.objects.create_user(
+            email=f'reader{index}@example.com', username=f'reader{index}',
+            first_name='Читатель', last_name=str(index), password='password')
+
+    assert get_queries(admin_client, CHANGELIST_URL) == before
+
+
+def test_search_by_username_and_email_prefix(user, author, admin_client):
+    for query in ('COOK', 'cook@'):
+        response = admin_client.get(CHANGELIST_URL, {'q': query})
+
+        assert list(response.context['cl'].result_list) == [user]
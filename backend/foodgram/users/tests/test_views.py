@@ -0,0 +1,118 @@
+import djoser.urls
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIClient
+
+from recipes.models import Subscribe
+from users import urls
+from users.views import CustomUserViewSet
+
+
+@pytest.fixture
+def readers(django_user_model):
+    def create(count):
+        start = django_user_model.objects.count()
+        return [django_user_model.objects.create_user(
+            email=f'reader{index}@example.com', username=f'reader{index}',
+            first_name='Читатель', last_name=str(index), password='password')
+            for index in range(start, start + count)]
+    return create
+
+
+def get(client, url, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return response.json(), [query['sql']
+                             for query in context.captured_queries]
+
+
+def get_subscribe_queries(queries):
+    return [sql for sql in queries if 'recipes_subscribe' in sql]
+
+
+def test_list_annotates_is_subscribed(user, author, user_client):
+    Subscribe.objects.create(user=user, author=author)
+
+    data, queries = get(user_client, '/api/users/')
+
+    assert {row['username']: row['is_subscribed']
+            for row in data['results']} == {'cook': False, 'chef': True}
+    # Подписка выбирается в запросе пользователей, а не отдельно.
+    assert all('users_user' in sql
+               for sql in get_subscribe_queries(queries))
+
+
+def test_list_queries_do_not_grow(user, author, readers, user_client):
+    Subscribe.objects.create(user=user, author=author)
+    _, one_page = get(user_client, '/api/users/', limit=2)
+    readers(8)
+    Subscribe.objects.bulk_create([
+        Subscribe(user=user, author=reader) for reader in readers(4)])
+
+    data, full_page = get(user_client, '/api/users/', limit=14)
+
+    assert len(data['results']) == 14
+    assert len(full_page) == len(one_page)
+
+
+@pytest.mark.parametrize('subscribed', (True, False))
+def test_retrieve_annotates_is_subscribed(admin_user, author, subscribed):
+    # Чужой профиль открывает только администратор.
+    if subscribed:
+        Subscribe.objects.create(user=admin_user, author=author)
+    client = APIClient()
+    client.force_authenticate(admin_user)
+
+    data, queries = get(client, f'/api/users/{author.id}/')
+
+    assert data['is_subscribed'] is subscribed
+    subscribe_queries = get_subscribe_queries(queries)
+    assert len(subscribe_queries) == 1
+    assert 'users_user' in subscribe_queries[0]
+
+
+def test_me_needs_no_subscription_query(user, author, user_client):
+    Subscribe.objects.create(user=user, author=author)
+
+    data, queries = get(user_client, '/api/users/me/')
+
+    assert data['id'] == user.id
+    assert data['is_subscribed'] is False
+    assert get_subscribe_queries(queries) == []
+
+
+def test_recipes_count_on_request(recipes, user_client):
+    data, _ = get(user_client, '/api/users/')
+    assert 'recipes_count' not in data['results'][0]
+
+    data, _ = get(user_client, '/api/users/', recipes_count='true')
+
+    assert {row['username']: row['recipes_count']
+            for row in data['results']} == {'cook': 3, 'chef': 3}
+
+
+def test_cursor_pagination_skips_count(user, author, readers, user_client):
+    readers(3)
+
+    data, queries = get(user_client, '/api/users/', cursor='', limit=2)
+
+    assert 'count' not in data
+    assert [row['username'] for row in data['results']] == ['cook', 'chef']
+    assert not any('COUNT(' in sql for sql in queries)
+    data, _ = get(user_client, data['next'])
+    assert [row['username'] for row in data['results']] == [
+        'reader2', 'reader3']
+
+
+def test_djoser_routes_are_kept():
+    def get_routes(patterns):
+        return {(str(pattern.pattern), pattern.name) for pattern in patterns}
+
+    router_urls = urls.router.urls
+    assert get_routes(router_urls) == get_routes(djoser.urls.urlpatterns)
+    for url in ('/api/users/', '/api/users/me/', '/api/users/set_password/',
+                '/api/auth/users/1/'):
+        assert resolve(url).func.cls is CustomUserViewSet
@@ -1,6 +1,12 @@
 from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from .views import CustomUserViewSet
+
+router = DefaultRouter()
+router.register('users', CustomUserViewSet)
 
 urlpatterns = [
-    path('', include('djoser.urls')),
+    path('', include(router.urls)),
     path('', include('djoser.urls.authtoken')),
 ]
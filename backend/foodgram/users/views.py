@@ -1,6 +1,10 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from djoser.views import UserViewSet
-from rest_framework.permissions import AllowAny
+
+from foodgram.pagination import FoodgramCursorPagination, FoodgramPagination
+from recipes.models import Recipe, Subscribe
 
 from .serializers import CustomUserSerializer
 
@@ -8,6 +12,36 @@ User = get_user_model()
 
 
 class CustomUserViewSet(UserViewSet):
-    serializer_class = CustomUserSerializer(many=True)
-    queryset = User.objects.all()
-    permission_classes = [AllowAny, ]
+    """Пользователи с подпиской и числом рецептов, посчитанными в запросе.
+
+    ``?recipes_count=true`` добавляет в ответ число рецептов автора,
+    ``?cursor=`` включает курсорную пагинацию без COUNT(*).
+    """
+    serializer_class = CustomUserSerializer
+    queryset = User.objects.order_by('id')
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if 'cursor' in self.request.query_params:
+                self._paginator = FoodgramCursorPagination()
+            else:
+                self._paginator = FoodgramPagination()
+        return self._paginator
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ['list', 'retrieve']:
+            return queryset
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                Subscribe.objects.filter(user=user, author=OuterRef('pk'))))
+        if self.request.query_params.get('recipes_count') in ['1', 'true']:
+            recipes_count = Recipe.objects.filter(
+                author=OuterRef('pk')
+            ).order_by().values('author').annotate(count=Count('id'))
+            queryset = queryset.annotate(recipes_count=Coalesce(
+                Subquery(recipes_count.values('count'),
+                         output_field=IntegerField()), 0))
+        return queryset